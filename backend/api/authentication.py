@@ -0,0 +1,118 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.authentication import TokenAuthentication
+
+REVOKED_KEY = 'tokens_revoked:{}'
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш token -> (user, token, revoked) с временем
+    жизни.
+
+    Кэш локален для процесса. Другие процессы узнают о выходе из
+    системы, смене пароля или блокировке по метке revoke_user_tokens
+    в общем кэше Django, которая проверяется при каждом попадании.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + settings.TOKEN_CACHE_TTL, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key, (_, value) in list(self._entries.items()):
+                if value[0].pk == user_id:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+            }
+
+
+token_cache = TokenCache()
+
+
+def is_cache_shared():
+    """Видят ли метки отзыва в кэше Django все процессы."""
+    return not isinstance(caches['default'], LOCAL_CACHE_BACKENDS)
+
+
+def get_revoked(user_id):
+    return cache.get(REVOKED_KEY.format(user_id))
+
+
+def revoke_user_tokens(user_id):
+    """Сбрасывает закэшированные токены пользователя во всех процессах.
+
+    Метка живёт TOKEN_CACHE_TTL: более старые записи истекают сами.
+    """
+    token_cache.invalidate_user(user_id)
+    cache.set(
+        REVOKED_KEY.format(user_id), time.time_ns(), settings.TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса Token + User на каждый вызов.
+
+    Запись кэша используется, только пока метка отзыва пользователя
+    в общем кэше та же, что при её сохранении. Если кэш Django свой
+    в каждом процессе (LocMemCache), другие процессы не узнают об отзыве,
+    поэтому токен, как в TokenAuthentication, проверяется по базе.
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_cache_shared():
+            return super().authenticate_credentials(key)
+        cached = token_cache.get(key)
+        if cached is not None and get_revoked(cached[0].pk) != cached[2]:
+            token_cache.invalidate(key)
+            cached = None
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cached = (user, token, get_revoked(user.pk))
+            token_cache.set(key, cached)
+        user, token, _ = cached
+        return copy.copy(user), token
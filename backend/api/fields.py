@@ -0,0 +1,119 @@
+import base64
+import binascii
+from hashlib import sha256
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework import serializers
+
+from recipes.images import RENDITIONS, rendition_name
+
+IMAGE_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+
+
+class HashedBase64ImageField(serializers.Field):
+    """Принимает картинку в Base64 и сохраняет её под именем-хэшем.
+
+    Строка декодируется кусками во временный файл, поэтому в памяти не
+    появляется второй полной копии картинки. Одинаковые картинки
+    сохраняются один раз: поле возвращает имя уже существующего файла.
+    """
+    default_error_messages = {
+        'invalid': 'Загрузите картинку, закодированную в Base64.',
+        'invalid_image': 'Файл не является поддерживаемой картинкой.',
+    }
+    chunk_size = 64 * 1024
+
+    def __init__(self, upload_to, storage=default_storage, **kwargs):
+        self.upload_to = upload_to
+        self.storage = storage
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        if ';base64,' in data:
+            data = data.split(';base64,', 1)[1]
+        # Base64 из писем и некоторых клиентов разбит на строки.
+        data = ''.join(data.split())
+        digest = sha256()
+        with SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE) as buffer:
+            for start in range(0, len(data), self.chunk_size):
+                try:
+                    chunk = base64.b64decode(
+                        data[start:start + self.chunk_size], validate=True)
+                except (binascii.Error, ValueError):
+                    self.fail('invalid')
+                digest.update(chunk)
+                buffer.write(chunk)
+            extension = self.get_extension(buffer)
+            name = f'{self.upload_to}{digest.hexdigest()}.{extension}'
+            if self.storage.exists(name):
+                return name
+            buffer.seek(0)
+            return self.storage.save(name, File(buffer))
+
+    def get_extension(self, buffer):
+        buffer.seek(0)
+        try:
+            with Image.open(buffer) as image:
+                image_format = image.format
+                image.verify()
+        except Exception:
+            self.fail('invalid_image')
+        if image_format not in IMAGE_EXTENSIONS:
+            self.fail('invalid_image')
+        return IMAGE_EXTENSIONS[image_format]
+
+    def to_representation(self, value):
+        return value
+
+
+def get_image_url(value, size, request=None, ready=False):
+    """Ссылка на WebP-копию размера size или на оригинал картинки.
+
+    ready — флаг Recipe.renditions_ready: пока копии не построены,
+    отдаётся оригинал, хранилище при этом не опрашивается.
+    """
+    if not value:
+        return None
+    if request is not None:
+        size = request.query_params.get(
+            RecipeImageField.size_query_param, size)
+    if ready and size in RENDITIONS:
+        url = value.storage.url(rendition_name(value.name, size))
+    else:
+        url = value.url
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class RecipeImageField(serializers.ImageField):
+    """Ссылка на WebP-копию картинки подходящего размера.
+
+    Размер выбирается параметром ?image_size= (small, medium, large или
+    original); пока фоновая копия не готова, отдаётся оригинал. Поле
+    получает рецепт целиком, чтобы прочитать флаг renditions_ready.
+    """
+    size_query_param = 'image_size'
+
+    def __init__(self, size='large', **kwargs):
+        self.size = size
+        kwargs['read_only'] = True
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return get_image_url(
+            recipe.image, self.size, self.context.get('request', None),
+            recipe.renditions_ready)
@@ -1,32 +1,101 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 from django_filters.widgets import BooleanWidget
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Recipe
+from recipes.cache import get_tag_ids
+from recipes.models import Favorite, Recipe, ShoppingCart, TagRecipe
+from recipes.search import ingredient_index, search_recipes
+
+MEMBERSHIP_FILTERS = {
+    'is_favorited': (Favorite, 'recipes_favorites'),
+    'is_in_shopping_cart': (ShoppingCart, 'recipes_shoppingcarts'),
+}
 
 
 class RecipeFilter(FilterSet):
     author = filters.AllValuesMultipleFilter(
         field_name='author__id'
     )
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug'
+    tags = filters.MultipleChoiceFilter(
+        choices=lambda: [(slug, slug) for slug in get_tag_ids()],
+        method='filter_tags',
     )
     is_favorited = filters.BooleanFilter(
+        method='filter_membership',
         widget=BooleanWidget()
     )
     is_in_shopping_cart = filters.BooleanFilter(
+        method='filter_membership',
         widget=BooleanWidget()
     )
 
     class Meta:
         model = Recipe
         fields = (
-            'author__id', 'tags__slug',
+            'author__id', 'tags',
             'is_favorited',
             'is_in_shopping_cart'
         )
 
+    def __init__(self, data=None, *args, **kwargs):
+        super().__init__(data, *args, **kwargs)
+        if hasattr(data, 'getlist') and 'tags' in data:
+            # Перечитать теги до проверки choices, если slug нет в кэше.
+            get_tag_ids(slugs=data.getlist('tags'))
+
+    def filter_membership(self, queryset, name, value):
+        """Рецепты из избранного или списка покупок пользователя.
+
+        Выборка начинается со строк пользователя (индекс по user, created)
+        и соединяется с рецептами, поэтому её стоимость зависит от длины
+        списка, а не от числа рецептов. Первый из фильтров упорядочивает
+        рецепты по времени добавления в список.
+        """
+        model, related_name = MEMBERSHIP_FILTERS[name]
+        user_id = self.request.user.id
+        if not value:
+            return queryset.exclude(Exists(
+                model.objects.filter(user_id=user_id, recipe=OuterRef('pk'))
+            ))
+        if user_id is None:
+            return queryset.none()
+        queryset = queryset.filter(**{f'{related_name}__user_id': user_id})
+        if queryset.query.order_by:
+            return queryset
+        return queryset.order_by(f'-{related_name}__created', '-id')
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        tag_ids = get_tag_ids(slugs=value)
+        return queryset.filter(Exists(
+            TagRecipe.objects.filter(
+                recipe=OuterRef('pk'),
+                tag_id__in=[tag_ids[slug] for slug in value],
+            )
+        ))
+
 
-class IngredientFilter(SearchFilter):
+class IngredientFilter(BaseFilterBackend):
     search_param = "name"
+
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(self.search_param)
+        if not name or view.action != 'list':
+            return queryset
+        return ingredient_index.search(name)
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск ?search= с сортировкой по релевантности."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        queryset = search_recipes(queryset, text)
+        if queryset.query.order_by:
+            return queryset
+        return queryset.order_by('-search_rank', '-pub_date', '-id')
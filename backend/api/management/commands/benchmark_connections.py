@@ -0,0 +1,182 @@
+"""
+Для сравнения режимов соединений с базой выполните команду:
+ python manage.py benchmark_connections --threads 8 --requests 2000
+ --pool-size 4
+
+Запросы идут через WSGIHandler из --threads потоков, как в воркере
+gunicorn с --threads, поэтому соединения открываются, проверяются и
+закрываются в начале и в конце запроса так же, как в рабочем процессе.
+Для каждого режима (новое соединение на запрос, CONN_MAX_AGE с
+CONN_HEALTH_CHECKS и пул на --pool-size соединений) выводятся запросы
+в секунду, p50, p95 и наибольшее число соединений с базой по
+pg_stat_activity (только для PostgreSQL). Проверка соединений и пул
+доступны только с DB_ENGINE=backend.postgresql. Команда лишь читает
+данные, поэтому базу стоит заранее заполнить командой seed.
+"""
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from backend.postgresql.base import close_pools
+
+DEFAULT_URLS = "/api/recipes/?limit=6,/api/tags/,/api/ingredients/?name=a"
+MODE_KEYS = ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "POOL_SIZE")
+COUNT_CONNECTIONS = (
+    "SELECT count(*) FROM pg_stat_activity "
+    "WHERE datname = current_database()"
+)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = max(0, int(round(percent / 100 * len(values))) - 1)
+    return values[index]
+
+
+class ConnectionMonitor(threading.Thread):
+    """Раз в interval секунд запоминает число соединений с базой.
+
+    Использует отдельное соединение psycopg2 в обход пула и вычитает
+    его из результата.
+    """
+
+    def __init__(self, wrapper, interval=0.05):
+        super().__init__(daemon=True)
+        self.connection = wrapper.Database.connect(
+            **wrapper.get_connection_params())
+        self.connection.autocommit = True
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        with self.connection.cursor() as cursor:
+            while not self._done.is_set():
+                cursor.execute(COUNT_CONNECTIONS)
+                self.peak = max(self.peak, cursor.fetchone()[0] - 1)
+                self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.connection.close()
+        return self.peak
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec and connections for connection modes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=8,
+            help="parallel worker threads")
+        parser.add_argument(
+            "--requests", type=int, default=2000,
+            help="requests per mode")
+        parser.add_argument(
+            "--pool-size", type=int, default=4,
+            help="connections in the pool mode")
+        parser.add_argument(
+            "--urls", type=str, default=DEFAULT_URLS,
+            help="comma separated GET urls requested in turn")
+
+    def handle(self, *args, **options):
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        modes = {
+            "new connection per request": (0, False, 0),
+            "persistent (CONN_MAX_AGE, health checks)": (60, True, 0),
+            f"pool of {options['pool_size']}": (
+                0, True, options["pool_size"]),
+        }
+        if not hasattr(wrapper, "pool"):
+            self.stdout.write(
+                f"{wrapper.settings_dict['ENGINE']} has no pool, skipping it")
+            modes.popitem()
+        settings_dict = wrapper.settings_dict
+        original = {key: settings_dict.get(key) for key in MODE_KEYS}
+        urls = options["urls"].split(",")
+        handler = WSGIHandler()
+        try:
+            for mode, values in modes.items():
+                settings_dict.update(zip(MODE_KEYS, values))
+                connections.close_all()
+                result = self.run_mode(handler, wrapper, urls, options)
+                self.stdout.write(
+                    "{mode}: {rps:.0f} requests/s, p50 {p50:.1f} ms, "
+                    "p95 {p95:.1f} ms, connections {connections}, "
+                    "errors {errors}".format(mode=mode, **result))
+        finally:
+            settings_dict.update(original)
+            connections.close_all()
+            close_pools()
+
+    def run_mode(self, handler, wrapper, urls, options):
+        threads = options["threads"]
+        per_thread = max(1, options["requests"] // threads)
+        monitor = None
+        if wrapper.vendor == "postgresql":
+            monitor = ConnectionMonitor(wrapper)
+            monitor.start()
+
+        def work(number):
+            timings = []
+            errors = 0
+            try:
+                for index in range(per_thread):
+                    url = urls[(number + index) % len(urls)]
+                    start = time.perf_counter()
+                    if self.call(handler, url) >= 400:
+                        errors += 1
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+            return timings, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(work, range(threads)))
+        elapsed = time.perf_counter() - start
+        close_pools()
+        timings = [timing for thread_timings, _ in results
+                   for timing in thread_timings]
+        return {
+            "rps": len(timings) / elapsed,
+            "p50": percentile(timings, 50),
+            "p95": percentile(timings, 95),
+            "connections": monitor.stop() if monitor else "n/a",
+            "errors": sum(errors for _, errors in results),
+        }
+
+    @staticmethod
+    def call(handler, url):
+        """GET через WSGI: request_started и request_finished
+        отправляются так же, как под gunicorn.
+        """
+        path, _, query = url.partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+        }
+        statuses = []
+        response = handler(
+            environ, lambda status, headers: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        if not statuses:
+            raise CommandError(f"{url} returned no response")
+        return int(statuses[0].split()[0])
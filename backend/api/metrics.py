@@ -0,0 +1,165 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+FINGERPRINT_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+_local = threading.local()
+
+
+def fingerprint(sql):
+    """SQL без значений: одинаковые запросы с разными параметрами
+    (в том числе IN-списки разной длины) дают одну строку.
+    """
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class RequestMetrics:
+    """Запросы к базе и время одного HTTP-запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements.append(sql)
+
+    @property
+    def fingerprints(self):
+        """Число запросов по SQL-шаблонам.
+
+        Шаблоны строятся только по запросу (для медленных запросов),
+        а не при каждом обращении к базе.
+        """
+        return Counter(fingerprint(sql) for sql in self.statements)
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def start_request():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def finish_request():
+    _local.metrics = None
+
+
+@contextmanager
+def serializer_timer():
+    """Учитывает время внешнего вызова to_representation.
+
+    Вложенные сериализаторы уже входят во время внешнего.
+    """
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - start
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Гистограммы по представлениям в памяти процесса.
+
+    Каждый воркер gunicorn отдаёт свои значения; суммирует их Prometheus.
+    """
+    histograms = (
+        ('foodgram_request_duration_seconds', 'total_time', DURATION_BUCKETS,
+         'Total request time.'),
+        ('foodgram_request_db_seconds', 'db_time', DURATION_BUCKETS,
+         'Time spent in database queries.'),
+        ('foodgram_request_serializer_seconds', 'serializer_time',
+         DURATION_BUCKETS, 'Time spent in serializers.'),
+        ('foodgram_request_queries', 'queries', QUERY_BUCKETS,
+         'Database queries per request.'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, method, values):
+        with self._lock:
+            histograms = self._views.get((view, method))
+            if histograms is None:
+                histograms = {
+                    attribute: Histogram(buckets)
+                    for _, attribute, buckets, _ in self.histograms
+                }
+                self._views[(view, method)] = histograms
+            for attribute, histogram in histograms.items():
+                histogram.observe(values[attribute])
+
+    def render(self, gauges=()):
+        lines = []
+        with self._lock:
+            for name, attribute, _, description in self.histograms:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (view, method), histograms in sorted(self._views.items()):
+                    labels = f'view="{view}",method="{method}"'
+                    lines.extend(histograms[attribute].render(name, labels))
+        for name, description, value in gauges:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,72 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from api.metrics import finish_request, registry, start_request
+
+logger = logging.getLogger('api.slow_requests')
+
+
+class InstrumentationMiddleware:
+    """Считает запросы к базе, время базы, сериализаторов и всего запроса.
+
+    Значения попадают в заголовок Server-Timing и в гистограммы
+    api.metrics.registry; запросы дольше SLOW_REQUEST_MS или с числом
+    запросов к базе больше SLOW_REQUEST_QUERIES пишутся в лог вместе
+    с самыми частыми SQL-шаблонами.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            finish_request()
+        values = {
+            'total_time': metrics.total_time,
+            'db_time': metrics.db_time,
+            'serializer_time': metrics.serializer_time,
+            'queries': metrics.queries,
+        }
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, request.method, values)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(values)
+        if (values['total_time'] * 1000 > settings.SLOW_REQUEST_MS
+                or values['queries'] > settings.SLOW_REQUEST_QUERIES):
+            self.log_slow_request(request, view, values, metrics)
+        return response
+
+    @staticmethod
+    def server_timing(values):
+        return ', '.join((
+            'db;dur={:.1f};desc="{} queries"'.format(
+                values['db_time'] * 1000, values['queries']),
+            'serializer;dur={:.1f}'.format(values['serializer_time'] * 1000),
+            'total;dur={:.1f}'.format(values['total_time'] * 1000),
+        ))
+
+    @staticmethod
+    def log_slow_request(request, view, values, metrics):
+        fingerprints = '\n'.join(
+            f'  {count} x {sql}'
+            for sql, count in metrics.fingerprints.most_common(
+                settings.SLOW_REQUEST_FINGERPRINTS)
+        )
+        logger.warning(
+            'Slow request %s %s (%s): %.1f ms, %d queries, db %.1f ms, '
+            'serializer %.1f ms\n%s',
+            request.method, request.get_full_path(), view,
+            values['total_time'] * 1000, values['queries'],
+            values['db_time'] * 1000, values['serializer_time'] * 1000,
+            fingerprints,
+        )
@@ -1,8 +1,19 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import status
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin, RetrieveModelMixin,
                                    UpdateModelMixin)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from api.metrics import serializer_timer
+from recipes.cache import get_model_version
+
 
 class ListCreateRetrieveUpdateDestroyViewSet(
     CreateModelMixin, DestroyModelMixin,
@@ -17,3 +28,50 @@ class ListRetrieveViewSet(
     GenericViewSet
 ):
     pass
+
+
+class CachedListRetrieveViewSet(ListRetrieveViewSet):
+    """Кэширует ответы list/retrieve до изменения модели.
+
+    Ключ кэша содержит версию модели, которую сбрасывают сигналы
+    (recipes.signals), поэтому устаревшие ответы не удаляются явно.
+    ETag — хэш самого ответа, поэтому он одинаков во всех процессах
+    и меняется только вместе с данными.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        version = get_model_version(self.queryset.model)
+        path = md5(request.get_full_path().encode()).hexdigest()
+        key = f'response:{self.basename}:{version}:{path}'
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = JSONRenderer().render(response.data)
+            cached = (response.data, f'"{md5(content).hexdigest()}"')
+            cache.set(key, cached, settings.REFERENCE_CACHE_TIMEOUT)
+        data, etag = cached
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.REFERENCE_MAX_AGE)
+        return response
+
+
+class TimedSerializerMixin:
+    """Учитывает время сериализации в метриках InstrumentationMiddleware."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
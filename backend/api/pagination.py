@@ -1,6 +1,131 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class RecipePagination(CustomPagination):
+    """Постраничная пагинация с опциональным keyset-режимом.
+
+    Keyset-режим включается параметром ?pagination=cursor (или наличием
+    ?cursor=): страница выбирается по (pub_date, id) последнего рецепта
+    без OFFSET, а count берётся из кэша на RECIPE_COUNT_CACHE_TIMEOUT
+    секунд вместо COUNT(*) на каждый запрос. Курсор хранит только
+    позицию в порядке (pub_date, id), поэтому вместе с поиском или
+    фильтрами избранного и списка покупок, которые задают свой порядок,
+    keyset-режим отклоняется с ошибкой 400.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_ordering_message = (
+        'Cursor pagination is only available for recipes ordered by '
+        'publication date')
+    ordering = ('-pub_date', '-id')
+    ignored_count_params = ('page', 'limit', 'cursor', 'pagination')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        ordering = tuple(queryset.query.order_by)
+        if ordering and ordering != self.ordering:
+            raise ValidationError(
+                {self.cursor_query_param: self.cursor_ordering_message})
+        self.request = request
+        self.count = self.get_cached_count(queryset, request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+        page_size = self.get_page_size(request)
+        page = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def encode_cursor(self, recipe):
+        position = f'{recipe.pub_date.isoformat()},{recipe.id}'
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, pk = urlsafe_b64decode(
+                encoded.encode()).decode().split(',')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
+
+    def get_cached_count(self, queryset, request):
+        params = sorted(
+            (key, request.query_params.getlist(key))
+            for key in request.query_params
+            if key not in self.ignored_count_params
+        )
+        digest = md5(f'{request.user.id}:{params}'.encode()).hexdigest()
+        return cache.get_or_set(
+            f'recipes_count:{digest}', queryset.count,
+            settings.RECIPE_COUNT_CACHE_TIMEOUT,
+        )
+
+
+class FeedPagination(RecipePagination):
+    """Keyset-пагинация ленты подписок, всегда в режиме cursor.
+
+    Вместо queryset принимает recipes.feed.UserFeed; count не считается.
+    """
+
+    def paginate_queryset(self, feed, request, view=None):
+        self.use_cursor = True
+        self.request = request
+        self.count = None
+        page_size = self.get_page_size(request)
+        page = feed.page(self.decode_cursor(request), page_size + 1)
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
@@ -1,25 +1,30 @@
+from django.conf import settings
 from django.forms import ValidationError
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from drf_writable_nested.serializers import WritableNestedModelSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
-from recipes.models import (Ingredient, IngredientInRecipe,
-                            Recipe, Tag, TagRecipe)
+from api.fields import HashedBase64ImageField, RecipeImageField
+from api.mixins import TimedSerializerMixin
+from recipes.cache import bump_model_version, get_tag_ids
+from recipes.membership import get_membership
+from recipes.models import (MAX_MULTIPLIER, MIN_MULTIPLIER, Ingredient,
+                            IngredientInRecipe, Recipe, Tag, TagRecipe)
+from recipes.search import update_search_vectors
 from users.models import Subscription, User
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name', 'color', 'slug',)
         read_only_fields = ('name', 'color', 'slug',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit',)
@@ -64,7 +69,7 @@ class UserDjoserCreateSerializer(UserCreateSerializer):
             return value
 
 
-class UserDjoserSerializer(UserSerializer):
+class UserDjoserSerializer(TimedSerializerMixin, UserSerializer):
     subscribed = serializers.SerializerMethodField(
         method_name='is_subscribed',
     )
@@ -78,11 +83,10 @@ class UserDjoserSerializer(UserSerializer):
         )
 
     def is_subscribed(self, obj):
-        user = self.context['request'].user
-        return (
-            user.is_authenticated
-            and Subscription.objects.filter(
-                user=user, author=obj).exists())
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        membership = get_membership(self.context['request'])
+        return obj.pk in membership.subscriptions
 
 
 class SubscriptionSerializer(UserDjoserSerializer):
@@ -90,10 +94,7 @@ class SubscriptionSerializer(UserDjoserSerializer):
         read_only=True,
         method_name='get_recipes',
     )
-    recipes_count = serializers.SerializerMethodField(
-        read_only=True,
-        method_name='get_recipes_count',
-    )
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -105,6 +106,10 @@ class SubscriptionSerializer(UserDjoserSerializer):
         )
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'recipes_preview'):
+            return RecipeMinifiedSerializer(
+                obj.recipes_preview, many=True, read_only=True
+            ).data
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit', None)
         if limit is not None:
@@ -115,17 +120,16 @@ class SubscriptionSerializer(UserDjoserSerializer):
             recipes, many=True, read_only=True
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer):
     author = UserDjoserSerializer(many=False, read_only=True)
     ingredients = IngredientInRecipeSerializer(
         source='ingredient_in_recipe', many=True, read_only=True
     )
-    is_favorited = serializers.BooleanField(default=False)
-    is_in_shopping_cart = serializers.BooleanField(default=False)
+    is_favorited = serializers.SerializerMethodField()
+    is_in_shopping_cart = serializers.SerializerMethodField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
@@ -136,6 +140,14 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'text', 'cooking_time',
         )
 
+    def get_is_favorited(self, obj):
+        membership = get_membership(self.context['request'])
+        return obj.pk in membership.favorites
+
+    def get_is_in_shopping_cart(self, obj):
+        membership = get_membership(self.context['request'])
+        return obj.pk in membership.shopping_cart
+
 
 class TagRecipeSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(source='tag.id')
@@ -159,7 +171,8 @@ class RecipeSerializer(WritableNestedModelSerializer):
     author = UserDjoserSerializer(read_only=True)
     ingredients = IngredientInRecipeSerializer(many=True)
     tags = tags = serializers.ListField(child=serializers.IntegerField())
-    image = Base64ImageField()
+    image = HashedBase64ImageField(
+        upload_to=Recipe._meta.get_field('image').upload_to)
 
     class Meta:
         model = Recipe
@@ -185,26 +198,53 @@ class RecipeSerializer(WritableNestedModelSerializer):
             ingredients_id.append(ingredient['ingredient']['id'])
         if len(ingredients_id) > len(set(ingredients_id)):
             raise ValidationError('Ингредиенты не могут повторяться')
+        if len(Ingredient.objects.in_bulk(ingredients_id)) < len(
+                ingredients_id):
+            raise ValidationError('Ингредиент не найден')
         if attrs['cooking_time'] <= 0:
             raise ValidationError('Время приготовления не может быть меньше 0')
         if len(attrs['tags']) < 0:
             raise ValidationError('Добавьте теги')
         if len(attrs['tags']) > len(set(attrs['tags'])):
             raise ValidationError('Теги не могут повторяться')
+        if not set(attrs['tags']) <= set(
+                get_tag_ids(ids=attrs['tags']).values()):
+            raise ValidationError('Тег не найден')
         return attrs
 
-    def get_or_set_ingredients_in_recipe(
-        self, ingredients_data, recipe,
-    ):
-        for ingredient_data in ingredients_data:
-            IngredientInRecipe.objects.create(
+    @staticmethod
+    def get_amounts(ingredients_data):
+        return {
+            ingredient_data['ingredient']['id']: ingredient_data['amount']
+            for ingredient_data in ingredients_data
+        }
+
+    def set_ingredients_in_recipe(self, ingredients_data, recipe):
+        amounts = self.get_amounts(ingredients_data)
+        current = {
+            ingredient_in_recipe.ingredient_id: ingredient_in_recipe
+            for ingredient_in_recipe in recipe.ingredient_in_recipe.all()
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            recipe.ingredient_in_recipe.filter(
+                ingredient_id__in=removed).delete()
+        changed = []
+        for ingredient_id in current.keys() & amounts.keys():
+            ingredient_in_recipe = current[ingredient_id]
+            if ingredient_in_recipe.amount != amounts[ingredient_id]:
+                ingredient_in_recipe.amount = amounts[ingredient_id]
+                changed.append(ingredient_in_recipe)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ('amount',))
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
                 recipe=recipe,
-                ingredient=get_object_or_404(
-                    Ingredient,
-                    id=ingredient_data['ingredient']['id']
-                ),
-                amount=ingredient_data['amount']
+                ingredient_id=ingredient_id,
+                amount=amounts[ingredient_id],
             )
+            for ingredient_id in amounts.keys() - current.keys()
+        )
 
     @transaction.atomic
     def create(self, validated_data):
@@ -212,34 +252,65 @@ class RecipeSerializer(WritableNestedModelSerializer):
         tags_data = validated_data.pop('tags')
         recipe = Recipe.objects.create(
             author=self.context['request'].user, **validated_data)
-        self.get_or_set_ingredients_in_recipe(ingredients_data, recipe)
-        recipe.tags.set(tags_data)
+        amounts = self.get_amounts(ingredients_data)
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+        )
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag_id=tag_id) for tag_id in tags_data
+        )
+        update_search_vectors(Recipe.objects.filter(pk=recipe.pk))
         return recipe
 
     def to_representation(self, instance):
+        request = self.context.get('request')
+        instance = Recipe.objects.add_read_relations().get(pk=instance.pk)
         return RecipeReadSerializer(
             instance,
-            context={'request': self.context.get('request')}
+            context={'request': request}
         ).data
 
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
-        instance.ingredients.clear()
-        instance.tags.clear()
         super().update(instance, validated_data)
-        self.get_or_set_ingredients_in_recipe(ingredients_data, instance)
+        self.set_ingredients_in_recipe(ingredients_data, instance)
         instance.tags.set(tags_data)
+        update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+        bump_model_version(IngredientInRecipe)
         return instance
 
 
-class RecipeMinifiedSerializer(serializers.ModelSerializer):
+class RecipeMinifiedSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer):
+    image = RecipeImageField(size='small')
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time',)
 
 
+class ShoppingCartSerializer(serializers.Serializer):
+    multiplier = serializers.FloatField(
+        min_value=MIN_MULTIPLIER, max_value=MAX_MULTIPLIER, default=1)
+
+
+class BulkSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_SIZE,
+    )
+
+
+class ShoppingCartBulkSerializer(BulkSerializer, ShoppingCartSerializer):
+    pass
+
+
 class SubscriptionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscription
@@ -0,0 +1,174 @@
+import csv
+import io
+import os
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.cache import get_model_version
+from recipes.models import Ingredient, IngredientInRecipe, ShoppingCart
+from recipes.units import merge_units
+
+SHOPPING_CART_KEY = 'shopping_cart:{}:{}'
+PDF_CHUNK_SIZE = 64 * 1024
+FONT_NAME = 'List'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'data', 'List.ttf')
+FONT_SIZE = 14
+LINE_HEIGHT = 20
+MARGIN = 50
+SUMMARY_FIELDS = ('calories', 'proteins', 'fats', 'carbohydrates', 'price')
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def get_shopping_cart_ingredients(user):
+    """Количества ингредиентов списка покупок с учётом множителя порций.
+
+    F() в annotate переиспользует join фильтра, поэтому каждое
+    количество умножается на multiplier записи этого же пользователя.
+    """
+    amount = F('amount') * F('recipe__recipes_shoppingcarts__multiplier')
+    return IngredientInRecipe.objects.filter(
+        recipe__recipes_shoppingcarts__user=user
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).annotate(
+        total_amount=Sum(amount),
+        **{
+            field: Sum(amount * F(f'ingredient__{field}'))
+            for field in SUMMARY_FIELDS
+        }
+    ).order_by('ingredient__name')
+
+
+def get_shopping_cart_state(user):
+    return ShoppingCart.objects.filter(user=user).aggregate(
+        last_updated=Max('updated'), count=Count('id')
+    )
+
+
+def get_shopping_cart_version(state):
+    """Версия списка покупок: меняется при добавлении, удалении и смене
+    множителя, а также при изменении ингредиентов и состава рецептов.
+    """
+    last_updated = state['last_updated']
+    timestamp = last_updated.timestamp() if last_updated else 0
+    return '{}-{}-{}-{}'.format(
+        state['count'],
+        timestamp,
+        get_model_version(Ingredient),
+        get_model_version(IngredientInRecipe),
+    )
+
+
+def get_shopping_cart_etag(rows, state, file_format):
+    """ETag из содержимого списка покупок, а не из версий в кэше.
+
+    Не меняется, пока не изменились строки списка, даже если версия
+    была вытеснена из кэша или список собран в другом процессе.
+    """
+    content = repr((state['count'], rows)).encode()
+    return f'"{file_format}-{md5(content).hexdigest()}"'
+
+
+def get_shopping_cart_rows(user, state):
+    """Материализованный список покупок пользователя.
+
+    Строки агрегируются одним запросом и хранятся в кэше на
+    SHOPPING_CART_CACHE_TIMEOUT секунд под ключом с версией списка,
+    поэтому любое изменение списка делает старую запись недоступной.
+    """
+    key = SHOPPING_CART_KEY.format(
+        user.id, get_shopping_cart_version(state))
+    return cache.get_or_set(
+        key, lambda: list(get_shopping_cart_ingredients(user)),
+        settings.SHOPPING_CART_CACHE_TIMEOUT,
+    )
+
+
+def iterate_ingredients(rows):
+    return merge_units(
+        (
+            row['ingredient__name'],
+            row['total_amount'],
+            row['ingredient__measurement_unit'],
+        )
+        for row in rows
+    )
+
+
+def get_shopping_cart_summary(rows, state):
+    """Ингредиенты в базовых единицах и итоги по пищевой ценности и цене.
+
+    Произведения количества на значения на единицу измерения суммируются
+    в базе тем же запросом, что и количества; ингредиенты без данных
+    перечисляются в incomplete.
+    """
+    totals = {
+        field: round(sum((row[field] or 0.0 for row in rows), 0.0), 2)
+        for field in SUMMARY_FIELDS
+    }
+    incomplete = sorted({
+        row['ingredient__name'] for row in rows
+        if any(row[field] is None for field in SUMMARY_FIELDS)
+    })
+    return {
+        'recipes': state['count'],
+        'ingredients': [
+            {'name': name, 'amount': amount, 'measurement_unit': unit}
+            for name, amount, unit in iterate_ingredients(rows)
+        ],
+        'totals': totals,
+        'incomplete': incomplete,
+    }
+
+
+def render_txt(rows):
+    for name, amount, unit in iterate_ingredients(rows):
+        yield f'{name}: {amount} {unit}\n'
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for row in iterate_ingredients(rows):
+        yield writer.writerow(row)
+
+
+def render_pdf(rows):
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer, pagesize=A4)
+    _, height = A4
+    position = height - MARGIN
+    page.setFont(FONT_NAME, FONT_SIZE)
+    for name, amount, unit in iterate_ingredients(rows):
+        if position < MARGIN:
+            page.showPage()
+            page.setFont(FONT_NAME, FONT_SIZE)
+            position = height - MARGIN
+        page.drawString(MARGIN, position, f'{name}: {amount} {unit}')
+        position -= LINE_HEIGHT
+    page.save()
+    buffer.seek(0)
+    return iter(lambda: buffer.read(PDF_CHUNK_SIZE), b'')
+
+
+RENDERERS = {
+    'txt': (render_txt, 'text/plain; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'pdf': (render_pdf, 'application/pdf'),
+}
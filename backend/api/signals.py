@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import revoke_user_tokens, token_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance, **kwargs):
+    token_cache.invalidate(instance.key)
+    user_id = instance.user_id
+    transaction.on_commit(lambda: revoke_user_tokens(user_id))
+
+
+@receiver((post_save, post_delete), sender=get_user_model())
+def invalidate_user_tokens(instance, **kwargs):
+    user_id = instance.pk
+    token_cache.invalidate_user(user_id)
+    transaction.on_commit(lambda: revoke_user_tokens(user_id))
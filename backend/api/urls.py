@@ -1,8 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
-                       UserViewSet)
+from api.views import (IngredientViewSet, MetricsView, RecipeViewSet,
+                       TagViewSet, TokenCacheStatsView, UserViewSet)
 
 router_v1 = DefaultRouter()
 
@@ -23,6 +23,9 @@ router_v1.register(
 
 urlpatterns = [
     path('', include(router_v1.urls)),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include('djoser.urls')),
+    path('auth/token/stats/', TokenCacheStatsView.as_view(),
+         name='token-cache-stats'),
     path('auth/', include('djoser.urls.authtoken')),
 ]
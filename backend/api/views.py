@@ -1,32 +1,68 @@
-from django.db import models
-from django.db.models import Sum, Exists, OuterRef
-from django.http import HttpResponse
+import os
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from recipes.models import (Favorite, Ingredient,
-                            IngredientInRecipe, Recipe, ShoppingCart, Tag)
+from recipes.bulk import bulk_add, bulk_remove, remove_one
+from recipes.feed import UserFeed
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 from users.models import Subscription, User
 
 from backend.settings import SHOP_LIST
-from api.filters import IngredientFilter, RecipeFilter
-from api.mixins import (ListCreateRetrieveUpdateDestroyViewSet,
-                        ListRetrieveViewSet)
-from api.pagination import CustomPagination
+from api.authentication import token_cache
+from api.fast_serializers import FastRecipeReadSerializer
+from api.filters import IngredientFilter, RecipeFilter, RecipeSearchFilter
+from api.metrics import registry
+from api.mixins import (CachedListRetrieveViewSet,
+                        ListCreateRetrieveUpdateDestroyViewSet)
+from api.pagination import (CustomPagination, FeedPagination,
+                            RecipePagination)
 from api.permissions import IsAdminOrReadOnly, IsAuthenticatedOwnerOnly
-from api.serializers import (IngredientSerializer, RecipeMinifiedSerializer,
-                             RecipeReadSerializer, RecipeSerializer,
-                             SubscriptionSerializer, TagSerializer,
-                             UserDjoserSerializer)
+from api.serializers import (BulkSerializer, IngredientSerializer,
+                             RecipeMinifiedSerializer, RecipeSerializer,
+                             ShoppingCartBulkSerializer,
+                             ShoppingCartSerializer, SubscriptionSerializer,
+                             TagSerializer, UserDjoserSerializer)
+from api.shopping_cart import (RENDERERS, get_shopping_cart_etag,
+                               get_shopping_cart_rows,
+                               get_shopping_cart_state,
+                               get_shopping_cart_summary)
 
 
 CONTENT_TYPE = 'text/plain'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def post_or_delete_bulk(request, model, targets,
+                        serializer_class=BulkSerializer):
+    """Добавляет или удаляет до BULK_MAX_SIZE записей model за запрос."""
+    serializer = serializer_class(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    fields = dict(serializer.validated_data)
+    ids = fields.pop('ids')
+    if request.method == 'POST':
+        results = bulk_add(model, request.user.id, ids, targets, **fields)
+    else:
+        results = bulk_remove(model, request.user.id, ids)
+    return Response({
+        'results': [
+            {'id': pk, 'status': result} for pk, result in results.items()
+        ]
+    })
 
 
 class UserViewSet(UserViewSet):
@@ -39,13 +75,31 @@ class UserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         queryset = User.objects.filter(
-            subscribed_to__user=request.user).order_by('subscribed_to')
+            subscribed_to__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).order_by('subscribed_to')
         page = self.paginate_queryset(queryset)
+        self.add_recipes_preview(page, request.query_params.get(
+            'recipes_limit'))
         serializer = SubscriptionSerializer(
             page, many=True, context={'request': request}
         )
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def add_recipes_preview(authors, limit):
+        if limit is not None:
+            if not limit.isdigit():
+                raise ValidationError(
+                    {'recipes_limit': 'Укажите целое неотрицательное число'})
+            limit = int(limit)
+        recipes = {author.id: [] for author in authors}
+        for recipe in Recipe.objects.top_per_author(list(recipes), limit):
+            recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.recipes_preview = recipes[author.id]
+
     @action(
         detail=True,
         methods=('POST', 'DELETE',),
@@ -54,45 +108,51 @@ class UserViewSet(UserViewSet):
     def subscribe(self, request, id):
         user = request.user
         author = get_object_or_404(User, pk=id)
-        subscription = Subscription.objects.filter(
-            user=user, author=author
-        )
         if request.method == 'POST':
-            if subscription:
+            if user == author:
                 return Response(
-                    {'errors': 'Вы уже подписаны на данного автора'},
+                    {'errors': 'Вы пытаетесь подписаться на самого себя!'},
                     status=status.HTTP_400_BAD_REQUEST)
-            elif user == author:
+            try:
+                with transaction.atomic():
+                    Subscription.objects.create(user=user, author=author)
+            except IntegrityError:
                 return Response(
-                    {'errors': 'Вы пытаетесь подписаться на самого себя!'},
+                    {'errors': 'Вы уже подписаны на данного автора'},
                     status=status.HTTP_400_BAD_REQUEST)
-            Subscription.objects.create(
-                user=user, author=author)
             serializer = UserDjoserSerializer(
                 author, context={'request': request, })
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
             )
-        if not subscription:
+        if not remove_one(Subscription, user.id, author.id):
             return Response(
                 {'errors': 'У Вас нет подписки на данного автора'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        subscription.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        methods=('POST', 'DELETE',),
+        url_path='subscribe/bulk',
+        permission_classes=(IsAuthenticated,)
+    )
+    def subscribe_bulk(self, request):
+        return post_or_delete_bulk(
+            request, Subscription, User.objects.exclude(pk=request.user.id))
+
 
-class IngredientViewSet(ListRetrieveViewSet):
+class IngredientViewSet(CachedListRetrieveViewSet):
     queryset = Ingredient.objects.all().order_by('name',)
     serializer_class = IngredientSerializer
     filter_backends = (IngredientFilter, )
     http_method_names = ('get',)
     lookup_fields = ('id',)
-    search_fields = ('^name', )
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class TagViewSet(ListRetrieveViewSet):
+class TagViewSet(CachedListRetrieveViewSet):
     queryset = Tag.objects.all().order_by('name',)
     serializer_class = TagSerializer
     http_method_names = ('get',)
@@ -118,17 +178,19 @@ class RecipeQuerySet(models.QuerySet):
 
 class RecipeViewSet(ListCreateRetrieveUpdateDestroyViewSet):
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthenticatedOwnerOnly)
-    pagination_class = CustomPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = RecipePagination
+    filter_backends = (DjangoFilterBackend, RecipeSearchFilter)
     filter_class = RecipeFilter
     queryset = Recipe.objects.all()
 
     def get_queryset(self):
-        return self.queryset.add_user_annotations(self.request.user.id)
+        if self.request.method in SAFE_METHODS:
+            return self.queryset.add_read_relations()
+        return self.queryset
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
-            return RecipeReadSerializer
+            return FastRecipeReadSerializer
         return RecipeSerializer
 
     @action(
@@ -137,54 +199,112 @@ class RecipeViewSet(ListCreateRetrieveUpdateDestroyViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        response = HttpResponse(content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename={SHOP_LIST}'
-
-        user = request.user
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe__recipes_shoppingcarts__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit').annotate(
-                total_amount=Sum('amount')
+        file_format = request.query_params.get('type', 'txt')
+        if file_format not in RENDERERS:
+            return Response(
+                {'errors': f'Доступные форматы: {", ".join(RENDERERS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        state = get_shopping_cart_state(request.user)
+        rows = get_shopping_cart_rows(request.user, state)
+        etag = get_shopping_cart_etag(rows, state, file_format)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        render, content_type = RENDERERS[file_format]
+        response = StreamingHttpResponse(
+            render(rows), content_type=content_type
+        )
+        name, _ = os.path.splitext(SHOP_LIST)
+        response['Content-Disposition'] = (
+            f'attachment; filename={name}.{file_format}'
         )
-        lines = []
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            amount = ingredient['total_amount']
-            unit = ingredient['ingredient__measurement_unit']
-            lines += f'{name}: {amount} {unit}\n'
-        response.writelines(lines)
+        response['ETag'] = etag
+        return response
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_summary(self, request):
+        state = get_shopping_cart_state(request.user)
+        rows = get_shopping_cart_rows(request.user, state)
+        etag = get_shopping_cart_etag(rows, state, 'summary')
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = Response(get_shopping_cart_summary(rows, state))
+        response['ETag'] = etag
         return response
 
+    @action(
+        detail=False,
+        methods=('GET',),
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        page = self.paginate_queryset(UserFeed(request.user))
+        serializer = FastRecipeReadSerializer(
+            page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=('GET',))
+    def similar(self, request, pk):
+        recipes = Recipe.objects.filter(
+            similar_to__recipe_id=pk
+        ).order_by('-similar_to__score').only(
+            'id', 'name', 'image', 'renditions_ready', 'cooking_time'
+        )[:settings.SIMILAR_RECIPES_COUNT]
+        if not recipes and not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        serializer = RecipeMinifiedSerializer(
+            recipes, many=True, context={'request': request})
+        return Response(serializer.data)
+
     @staticmethod
-    def post_or_delete_object(model, recipe, request):
-        current_model = model.objects.filter(
-            user=request.user, recipe=recipe
-        )
+    def post_or_delete_object(model, recipe, request, **fields):
         if request.method == 'POST':
-            if current_model.exists():
+            try:
+                with transaction.atomic():
+                    model.objects.create(
+                        user=request.user, recipe=recipe, **fields)
+            except IntegrityError:
                 return Response(
                     {'errors': 'Ошибка добавления. Уже есть в списке'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            model.objects.create(user=request.user, recipe=recipe)
             serializer = RecipeMinifiedSerializer(recipe)
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
             )
-        current_model.delete()
+        remove_one(model, request.user.id, recipe.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
         detail=True,
         permission_classes=(IsAuthenticated,),
-        methods=('POST', 'DELETE',)
+        methods=('POST', 'PATCH', 'DELETE',)
     )
     def shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, pk=pk)
-        return self.post_or_delete_object(
-            model=ShoppingCart, recipe=recipe, request=request)
+        if request.method == 'DELETE':
+            return self.post_or_delete_object(
+                model=ShoppingCart, recipe=recipe, request=request)
+        serializer = ShoppingCartSerializer(
+            data=request.data, partial=request.method == 'PATCH')
+        serializer.is_valid(raise_exception=True)
+        if request.method == 'POST':
+            return self.post_or_delete_object(
+                model=ShoppingCart, recipe=recipe, request=request,
+                **serializer.validated_data)
+        shopping_cart = get_object_or_404(
+            ShoppingCart, user=request.user, recipe=recipe)
+        shopping_cart.multiplier = serializer.validated_data.get(
+            'multiplier', shopping_cart.multiplier)
+        shopping_cart.save(update_fields=('multiplier', 'updated'))
+        return Response(RecipeMinifiedSerializer(recipe).data)
 
     @action(
         detail=True,
@@ -195,3 +315,46 @@ class RecipeViewSet(ListCreateRetrieveUpdateDestroyViewSet):
         recipe = get_object_or_404(Recipe, pk=pk)
         return self.post_or_delete_object(
             model=Favorite, recipe=recipe, request=request)
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        methods=('POST', 'DELETE',),
+        url_path='shopping_cart/bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        return post_or_delete_bulk(
+            request, ShoppingCart, Recipe.objects.all(),
+            ShoppingCartBulkSerializer)
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        methods=('POST', 'DELETE',),
+        url_path='favorite/bulk'
+    )
+    def favorite_bulk(self, request):
+        return post_or_delete_bulk(request, Favorite, Recipe.objects.all())
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        stats = token_cache.stats()
+        gauges = (
+            ('foodgram_token_cache_size', 'Cached tokens.', stats['size']),
+            ('foodgram_token_cache_hits_total', 'Token cache hits.',
+             stats['hits']),
+            ('foodgram_token_cache_misses_total', 'Token cache misses.',
+             stats['misses']),
+        )
+        return HttpResponse(
+            registry.render(gauges), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class TokenCacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(token_cache.stats())
@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений psycopg2 на процесс.
+
+    Потоки воркера берут соединение при первом запросе к базе и
+    возвращают его при закрытии, поэтому одновременно открыто не больше
+    size соединений. Если свободных нет дольше timeout секунд, выбрасывается
+    OperationalError.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def acquire(self, connect, check=False):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise base.Database.OperationalError(
+                f'No free connection in the pool of {self.size} '
+                f'after {self.timeout} s')
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if not check or self.is_usable(connection):
+                    return connection
+                connection.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        try:
+            if connection.closed:
+                return
+            status = connection.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_INTRANS:
+                connection.rollback()
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                discard = True
+            if discard:
+                connection.close()
+            else:
+                self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except base.Database.Error:
+            return False
+        return True
+
+    def close(self):
+        """Закрывает свободные соединения пула."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def get_pool(alias, size, timeout):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(size, timeout)
+        return _pools[alias]
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд PostgreSQL с проверкой постоянных соединений и пулом.
+
+    CONN_HEALTH_CHECKS, как в Django 4.1: соединение, пережившее
+    предыдущий запрос (CONN_MAX_AGE > 0), проверяется SELECT 1 перед
+    первым обращением в новом запросе и при ошибке открывается заново.
+
+    POOL_SIZE > 0 включает общий для потоков процесса пул соединений
+    (для воркеров gunicorn с --threads); соединение возвращается в пул
+    в конце каждого запроса, CONN_MAX_AGE при этом не используется.
+    """
+
+    def __init__(self, settings_dict, alias='default'):
+        settings_dict.setdefault('CONN_HEALTH_CHECKS', False)
+        settings_dict.setdefault('POOL_SIZE', 0)
+        settings_dict.setdefault('POOL_TIMEOUT', 10)
+        super().__init__(settings_dict, alias)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        if not self.settings_dict['POOL_SIZE']:
+            return None
+        return get_pool(
+            self.alias,
+            self.settings_dict['POOL_SIZE'],
+            self.settings_dict['POOL_TIMEOUT'],
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connect = super().get_new_connection
+        connection = pool.acquire(
+            lambda: connect(conn_params),
+            check=self.settings_dict['CONN_HEALTH_CHECKS'],
+        )
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+        if self.pool is not None:
+            # Вернуть соединение в пул в конце запроса.
+            self.close_at = time.monotonic()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None:
+            super()._close()
+            return
+        # Соединение, закрытое внутри atomic(), остаётся у обёртки до
+        # следующего connect(), поэтому в пул оно не возвращается.
+        with self.wrap_database_errors:
+            pool.release(
+                self.connection,
+                discard=self.errors_occurred or self.in_atomic_block,
+            )
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None
+                or not self.settings_dict['CONN_HEALTH_CHECKS']
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
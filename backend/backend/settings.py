@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,6 +69,18 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", default="Flex3365"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT", default="5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", default=0)),
+        "CONN_HEALTH_CHECKS": bool(int(os.getenv("DB_CONN_HEALTH_CHECKS", default=1))),
+        "POOL_SIZE": int(os.getenv("DB_POOL_SIZE", default=0)),
+        "POOL_TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", default=10)),
+    }
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
     }
 }
 
@@ -110,7 +123,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -134,3 +147,37 @@ DJOSER = {
 }
 
 SHOP_LIST = 'shopping_list.txt'
+
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=300))
+
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT', default=300))
+
+REFERENCE_MAX_AGE = int(os.getenv('REFERENCE_MAX_AGE', default=60))
+
+RECIPE_COUNT_CACHE_TIMEOUT = int(os.getenv('RECIPE_COUNT_CACHE_TIMEOUT', default=60))
+
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', default=2))
+
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', default=60))
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=10000))
+
+MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv('MEMBERSHIP_CACHE_TIMEOUT', default=0))
+
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', default=10))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', default=1000))
+
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', default=100))
+
+SERVER_TIMING = int(os.getenv('SERVER_TIMING', default=1))
+
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', default=500))
+
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', default=30))
+
+SLOW_REQUEST_FINGERPRINTS = int(os.getenv('SLOW_REQUEST_FINGERPRINTS', default=5))
+
+SHOPPING_CART_CACHE_TIMEOUT = int(os.getenv('SHOPPING_CART_CACHE_TIMEOUT', default=300))
+
+BULK_MAX_SIZE = int(os.getenv('BULK_MAX_SIZE', default=100))
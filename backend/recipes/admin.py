@@ -1,7 +1,9 @@
 from django.contrib import admin
 
+from recipes.cache import bump_model_version
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
                             ShoppingCart, Tag, TagRecipe)
+from recipes.search import update_search_vectors
 
 
 class IngredientInRecipeInline(admin.TabularInline):
@@ -29,6 +31,11 @@ class IngredientAdmin(admin.ModelAdmin):
     list_filter = ('measurement_unit',)
     inlines = (IngredientInRecipeInline,)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        bump_model_version(IngredientInRecipe)
+        update_search_vectors(Recipe.objects.filter(ingredients=form.instance))
+
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
@@ -41,9 +48,14 @@ class RecipeAdmin(admin.ModelAdmin):
         TagRecipeInline,
     ]
 
-    @admin.display
+    @admin.display(ordering='favorites_count')
     def amount_in_favorite(self, obj):
-        return obj.recipe_recipes_favorite_related.all().count()
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        bump_model_version(IngredientInRecipe)
+        update_search_vectors(Recipe.objects.filter(pk=form.instance.pk))
 
 
 @admin.register(Favorite)
@@ -55,7 +67,7 @@ class FavoriteAdmin(admin.ModelAdmin):
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe',)
+    list_display = ('user', 'recipe', 'multiplier',)
     search_fields = ('recipe__name', 'user__username', 'user__email',)
     list_filter = ('recipe__tags',)
 
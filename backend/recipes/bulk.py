@@ -0,0 +1,106 @@
+from django.db import IntegrityError, transaction
+
+from recipes.counters import COUNTERS, change_counters
+from recipes.feed import backfill_many, remove_many
+from recipes.membership import MEMBERSHIP_KINDS, invalidate_membership
+from users.models import Subscription
+
+CREATED = 'created'
+EXISTS = 'exists'
+DELETED = 'deleted'
+MISSING = 'missing'
+NOT_FOUND = 'not_found'
+
+INSERT_ATTEMPTS = 3
+
+
+def changed(model, user_id, pks, delta):
+    """Повторяет действие сигналов post_save и post_delete для всех
+    изменённых записей сразу: счётчики меняются на delta одним UPDATE,
+    а кэш принадлежности сбрасывается один раз.
+    """
+    change_counters(model, pks, delta)
+    kind = MEMBERSHIP_KINDS[model]
+    transaction.on_commit(lambda: invalidate_membership(user_id, kind))
+
+
+@transaction.atomic
+def bulk_add(model, user_id, ids, targets, **fields):
+    """Добавляет записи model пользователя для объектов ids одним INSERT.
+
+    targets — queryset допустимых объектов, остальные id получают статус
+    not_found. Возвращает словарь id -> created, exists или not_found
+    в порядке ids.
+    """
+    _, field, _ = COUNTERS[model]
+    found = set(targets.filter(pk__in=ids).values_list('pk', flat=True))
+    for attempt in range(INSERT_ATTEMPTS):
+        existing = set(model.objects.filter(
+            user_id=user_id, **{f'{field}__in': found}
+        ).values_list(field, flat=True))
+        created = found - existing
+        try:
+            # Без ignore_conflicts INSERT добавляет либо все строки, либо
+            # ни одной, поэтому счётчики растут ровно на len(created).
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    model(user_id=user_id, **{field: pk}, **fields)
+                    for pk in created
+                )
+            break
+        except IntegrityError:
+            # Параллельный запрос успел добавить часть записей.
+            if attempt == INSERT_ATTEMPTS - 1:
+                raise
+    if created:
+        changed(model, user_id, created, 1)
+        if model is Subscription:
+            backfill_many(user_id, created)
+    return {
+        pk: CREATED if pk in created else EXISTS if pk in existing
+        else NOT_FOUND
+        for pk in ids
+    }
+
+
+@transaction.atomic
+def remove_one(model, user_id, pk):
+    """Удаляет запись model пользователя для объекта pk одним DELETE.
+
+    Действие сигналов повторяется, только если DELETE удалил строку,
+    поэтому параллельные удаления одной записи не уменьшают счётчик
+    дважды. Возвращает True, если запись была удалена.
+    """
+    _, field, _ = COUNTERS[model]
+    queryset = model.objects.filter(user_id=user_id, **{field: pk})
+    if not queryset._raw_delete(queryset.db):
+        return False
+    changed(model, user_id, (pk,), -1)
+    if model is Subscription:
+        remove_many(user_id, (pk,))
+    return True
+
+
+@transaction.atomic
+def bulk_remove(model, user_id, ids):
+    """Удаляет записи model пользователя для объектов ids одним DELETE.
+
+    Строки блокируются SELECT FOR UPDATE и удаляются по первичному
+    ключу, поэтому счётчики уменьшаются только за строки, которые
+    удалил этот запрос. Возвращает словарь id -> deleted или missing
+    в порядке ids.
+    """
+    _, field, _ = COUNTERS[model]
+    rows = dict(model.objects.filter(
+        user_id=user_id, **{f'{field}__in': ids}
+    ).select_for_update().values_list('pk', field))
+    removed = set(rows.values())
+    if rows:
+        # delete() отправил бы post_delete по каждой записи; на эти
+        # модели никто не ссылается, поэтому удаляем без Collector.
+        queryset = model.objects.filter(pk__in=rows)
+        queryset._raw_delete(queryset.db)
+        changed(model, user_id, removed, -1)
+        if model is Subscription:
+            remove_many(user_id, removed)
+    return {pk: DELETED if pk in removed else MISSING for pk in ids}
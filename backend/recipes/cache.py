@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Tag
+
+VERSION_KEY = 'version:{}'
+
+
+def get_model_version(model):
+    """Метка последнего изменения модели в наносекундах.
+
+    Метка не истекает и меняется только bump_model_version, иначе все
+    закэшированные с ней данные перечитывались бы при каждом истечении.
+    """
+    key = VERSION_KEY.format(model._meta.label_lower)
+    return cache.get_or_set(key, time.time_ns, timeout=None)
+
+
+def bump_model_version(model):
+    key = VERSION_KEY.format(model._meta.label_lower)
+    cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_tag_ids(slugs=(), ids=()):
+    """Словарь slug -> id тегов, сбрасывается вместе с версией Tag.
+
+    Если каких-то slugs или ids в словаре нет, он перечитывается из базы:
+    тег мог быть создан в другом процессе.
+    """
+    key = f'tag_ids:{get_model_version(Tag)}'
+    tag_ids = cache.get(key)
+    if (tag_ids is None or not set(slugs) <= tag_ids.keys()
+            or not set(ids) <= set(tag_ids.values())):
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, settings.REFERENCE_CACHE_TIMEOUT)
+    return tag_ids
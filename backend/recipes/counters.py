@@ -0,0 +1,56 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+
+# Модель связи -> (модель со счётчиком, поле связи, поле счётчика).
+COUNTERS = {
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShoppingCart: (Recipe, 'recipe_id', 'shopping_carts_count'),
+    Recipe: (User, 'author_id', 'recipes_count'),
+    Subscription: (User, 'author_id', 'subscribers_count'),
+}
+
+
+def change_counters(sender, pks, delta):
+    """Изменяет счётчик sender у объектов pks на delta одним UPDATE."""
+    model, _, counter = COUNTERS[sender]
+    return model.objects.filter(pk__in=pks).update(
+        **{counter: Greatest(F(counter) + delta, 0)}
+    )
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        0
+    )
+
+
+def recount_counters():
+    """Пересчитывает все счётчики одним UPDATE на таблицу."""
+    recipes = Recipe.objects.update(
+        favorites_count=count_subquery(Favorite, 'recipe'),
+        shopping_carts_count=count_subquery(ShoppingCart, 'recipe'),
+    )
+    users = User.objects.update(
+        recipes_count=count_subquery(Recipe, 'author'),
+        subscribers_count=count_subquery(Subscription, 'author'),
+    )
+    return recipes, users
+
+
+def recount(sender, pks):
+    """Пересчитывает счётчик sender у объектов pks одним UPDATE."""
+    model, field, counter = COUNTERS[sender]
+    return model.objects.filter(pk__in=pks).update(
+        **{counter: count_subquery(sender, field)}
+    )
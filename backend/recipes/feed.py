@@ -0,0 +1,142 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription, User
+
+BATCH_SIZE = 1000
+
+
+def is_fanned_out(author_id):
+    """Рассылаются ли рецепты автора в ленты подписчиков при записи.
+
+    Рецепты авторов с числом подписчиков больше FEED_FANOUT_LIMIT
+    не копируются в ленты, а подмешиваются при чтении.
+    """
+    subscribers = User.objects.filter(pk=author_id).values_list(
+        'subscribers_count', flat=True).first()
+    return (subscribers or 0) <= settings.FEED_FANOUT_LIMIT
+
+
+def fan_out(recipe):
+    """Добавляет новый рецепт в ленты подписчиков автора.
+
+    Нерассланный рецепт помечается fanned_out=False и подмешивается при
+    чтении, даже если у автора потом станет меньше подписчиков.
+    """
+    if not is_fanned_out(recipe.author_id):
+        Recipe.objects.filter(pk=recipe.pk).update(fanned_out=False)
+        recipe.fanned_out = False
+        return
+    followers = Subscription.objects.filter(
+        author_id=recipe.author_id).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe=recipe,
+                author_id=recipe.author_id,
+                pub_date=recipe.pub_date,
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние FEED_BACKFILL_SIZE рецептов автора."""
+    backfill_many(user_id, (author_id,))
+
+
+def backfill_many(user_id, author_ids):
+    """backfill для нескольких авторов: три запроса на всех авторов."""
+    author_ids = list(User.objects.filter(
+        pk__in=author_ids,
+        subscribers_count__lte=settings.FEED_FANOUT_LIMIT,
+    ).values_list('pk', flat=True))
+    if not author_ids:
+        return
+    recipes = Recipe.objects.top_per_author(
+        author_ids, settings.FEED_BACKFILL_SIZE)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe.id,
+                author_id=recipe.author_id,
+                pub_date=recipe.pub_date,
+            )
+            for recipe in recipes
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def remove(user_id, author_id):
+    remove_many(user_id, (author_id,))
+
+
+def remove_many(user_id, author_ids):
+    FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids).delete()
+
+
+def rebuild_feeds():
+    """Заполняет ленты заново по текущим подпискам."""
+    FeedEntry.objects.all().delete()
+    subscriptions = Subscription.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in subscriptions.iterator():
+        backfill(user_id, author_id)
+    return FeedEntry.objects.count()
+
+
+class UserFeed:
+    """Лента рецептов авторов, на которых подписан пользователь.
+
+    Страница собирается слиянием двух keyset-выборок по (pub_date, id):
+    записей ленты пользователя и рецептов, которых нет в лентах, —
+    всех рецептов авторов выше FEED_FANOUT_LIMIT и рецептов,
+    опубликованных, пока автор был выше лимита.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def page(self, position, size):
+        entries = FeedEntry.objects.filter(user=self.user)
+        authors = Subscription.objects.filter(user=self.user)
+        popular = Recipe.objects.filter(
+            Q(author__in=authors.filter(
+                author__subscribers_count__gt=settings.FEED_FANOUT_LIMIT,
+            ).values('author'))
+            | Q(author__in=authors.values('author'), fanned_out=False)
+        )
+        if position is not None:
+            pub_date, pk = position
+            entries = entries.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, recipe_id__lt=pk)
+            )
+            popular = popular.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+        keys = heapq.merge(
+            entries.order_by('-pub_date', '-recipe_id').values_list(
+                'pub_date', 'recipe_id')[:size],
+            popular.order_by('-pub_date', '-id').values_list(
+                'pub_date', 'id')[:size],
+            reverse=True,
+        )
+        recipe_ids = list(islice(
+            dict.fromkeys(recipe_id for _, recipe_id in keys), size))
+        recipes = Recipe.objects.add_read_relations().in_bulk(recipe_ids)
+        return [
+            recipes[recipe_id] for recipe_id in recipe_ids
+            if recipe_id in recipes
+        ]
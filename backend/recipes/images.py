@@ -0,0 +1,104 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from PIL import Image
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'small': 320,
+    'medium': 640,
+    'large': 1280,
+}
+RENDITIONS_DIR = 'recipes/media/renditions/'
+RENDITION_FORMAT = 'WEBP'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_name(name, size):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f'{RENDITIONS_DIR}{stem}_{size}.webp'
+
+
+def get_missing_renditions(name, storage=default_storage):
+    return {
+        size: width for size, width in RENDITIONS.items()
+        if not storage.exists(rendition_name(name, size))
+    }
+
+
+def build_renditions(name, storage=default_storage):
+    """Создаёт недостающие WebP-копии изображения для всех размеров
+    и отмечает рецепты с этой картинкой флагом renditions_ready.
+    """
+    missing = get_missing_renditions(name, storage)
+    if missing:
+        save_renditions(name, missing, storage)
+    Recipe.objects.filter(image=name, renditions_ready=False).update(
+        renditions_ready=True)
+
+
+def save_renditions(name, missing, storage):
+    with storage.open(name) as file, Image.open(file) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        for size, width in missing.items():
+            rendition = image.copy()
+            rendition.thumbnail((width, width))
+            buffer = io.BytesIO()
+            rendition.save(buffer, RENDITION_FORMAT)
+            expected = rendition_name(name, size)
+            saved = storage.save(expected, ContentFile(buffer.getvalue()))
+            if saved != expected:
+                # Копию уже построил параллельный запрос.
+                storage.delete(saved)
+
+
+def _build_renditions_safely(name):
+    try:
+        build_renditions(name)
+    except Exception:
+        logger.exception('Failed to build renditions for %s', name)
+
+
+def _build_renditions_in_worker(name):
+    """Задача фонового потока: соединение с базой у потока своё,
+    поэтому оно закрывается после каждой задачи, как после запроса.
+    """
+    close_old_connections()
+    try:
+        _build_renditions_safely(name)
+    finally:
+        connection.close()
+
+
+def schedule_renditions(name):
+    """Передаёт построение копий фоновому пулу потоков.
+
+    При IMAGE_RENDITION_WORKERS = 0 копии строятся сразу.
+    """
+    global _executor
+    if not name:
+        return
+    if not settings.IMAGE_RENDITION_WORKERS:
+        _build_renditions_safely(name)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                thread_name_prefix='renditions',
+            )
+    _executor.submit(_build_renditions_in_worker, name)
@@ -0,0 +1,32 @@
+"""
+Для построения недостающих WebP-копий картинок рецептов выполните:
+ python manage.py build_renditions
+
+Команду нужно запустить после миграции 0012_recipe_renditions_ready:
+миграция только добавляет флаг и не обращается к хранилищу картинок.
+
+Рецепты с готовыми копиями отмечаются флагом renditions_ready; до этого
+API отдаёт ссылку на оригинал картинки.
+"""
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Build missing image renditions of recipes"
+
+    def handle(self, *args, **options):
+        names = Recipe.objects.exclude(image='').values_list(
+            'image', flat=True).distinct()
+        built = 0
+        for name in names.iterator():
+            try:
+                build_renditions(name)
+            except OSError as err:
+                self.stdout.write(f'Error! {name}: {err}')
+                continue
+            built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {built} images"))
@@ -3,32 +3,229 @@
  python manage.py import
  --path "/c/Dev/foodgram-project-react/data/ingredients.csv"
  --model_name "recipes.Ingredient"
+
+Поддерживаются CSV (с заголовком или с --fields) и JSON (список
+объектов). Строки сопоставляются с существующими записями по
+--unique_fields (по умолчанию поля уникального ограничения модели,
+например name,measurement_unit у ингредиентов): новые вставляются
+пачками через bulk_create, изменённые обновляются через bulk_update,
+совпадающие, некорректные и нарушающие другие уникальные ограничения
+пропускаются. С --dry_run база не меняется.
 """
 import csv
+import json
+import os
+import time
+from collections import Counter
+from itertools import islice
 
 from django.apps import apps
-from django.core.management.base import BaseCommand
-from django.db.utils import IntegrityError
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from recipes.cache import bump_model_version
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+BATCH_SIZE = 1000
 
 
 class Command(BaseCommand):
-    help = "Import data from CSV file"
+    help = "Import data from CSV or JSON file"
 
     def add_arguments(self, parser):
         parser.add_argument("--path", type=str, help="file path")
         parser.add_argument("--model_name", type=str, help="model name")
+        parser.add_argument(
+            "--fields", type=str, default=None,
+            help="comma separated columns of a CSV file without header")
+        parser.add_argument(
+            "--unique_fields", type=str, default=None,
+            help="comma separated fields identifying an existing row")
+        parser.add_argument(
+            "--batch_size", type=int, default=BATCH_SIZE,
+            help="rows per transaction")
+        parser.add_argument(
+            "--dry_run", action="store_true",
+            help="validate and count rows without writing them")
 
     def handle(self, *args, **options):
-        file_path = options["path"]
         model = apps.get_model(options["model_name"])
+        self.stats = Counter()
+        start = time.monotonic()
+        with open(options["path"], "r", encoding="utf-8") as file:
+            fields, rows = self.read_rows(file, options)
+            unique_fields = (
+                options["unique_fields"].split(",")
+                if options["unique_fields"]
+                else self.get_unique_fields(model, fields)
+            )
+            update_fields = [
+                field for field in fields if field not in unique_fields
+            ]
+            existing = self.get_existing(model, fields, unique_fields)
+            instances = self.validate(model, rows, unique_fields, existing)
+            while True:
+                batch = list(islice(instances, options["batch_size"]))
+                if not batch:
+                    break
+                if options["dry_run"]:
+                    self.count(batch)
+                else:
+                    self.save(model, batch, update_fields)
+        if not options["dry_run"]:
+            # bulk_create и bulk_update не отправляют сигналы модели.
+            bump_model_version(model)
+            if model is Ingredient:
+                ingredient_index.invalidate()
+        self.report(time.monotonic() - start, options["dry_run"])
+
+    def read_rows(self, file, options):
+        if os.path.splitext(options["path"])[1].lower() == ".json":
+            data = json.load(file)
+            if not data:
+                raise CommandError("File is empty")
+            return list(data[0]), iter(data)
+        reader = csv.reader(file, delimiter=",")
+        if options["fields"]:
+            header = options["fields"].split(",")
+        else:
+            header = next(reader)
+        return header, (self.parse_row(header, row) for row in reader)
+
+    def parse_row(self, header, row):
+        if len(row) != len(header):
+            return row
+        return dict(zip(header, row))
+
+    @staticmethod
+    def get_unique_fields(model, fields):
+        """Поля первого уникального ограничения модели, которые есть
+        в файле: сначала ограничения из Meta, затем unique-поля.
+        """
+        for constraint in model._meta.total_unique_constraints:
+            if set(constraint.fields) <= set(fields):
+                return list(constraint.fields)
+        for name in fields:
+            if model._meta.get_field(name).unique:
+                return [name]
+        raise CommandError(
+            "No unique constraint among the file fields, "
+            "pass --unique_fields")
+
+    def get_existing(self, model, fields, unique_fields):
+        return {
+            tuple(values[field] for field in unique_fields): values
+            for values in model.objects.values("pk", *fields).iterator()
+        }
+
+    def validate(self, model, rows, unique_fields, existing):
+        seen = set()
+        for number, data in enumerate(rows, start=1):
+            if not isinstance(data, dict):
+                self.skip(number, "wrong number of columns", data)
+                continue
+            try:
+                instance = model(**self.to_python(model, data))
+                instance.clean_fields()
+            except (TypeError, FieldDoesNotExist) as err:
+                self.skip(number, err, data)
+                continue
+            except ValidationError as err:
+                self.skip(number, err.messages, data)
+                continue
+            key = tuple(getattr(instance, field) for field in unique_fields)
+            if key in seen:
+                self.skip(number, "duplicate row", data)
+                continue
+            seen.add(key)
+            current = existing.get(key)
+            if current is None:
+                yield instance
+                continue
+            if all(current[field] == getattr(instance, field)
+                   for field in data):
+                self.stats["skipped"] += 1
+                continue
+            instance.pk = current["pk"]
+            yield instance
+
+    @staticmethod
+    def to_python(model, data):
+        """Приводит значения к типам полей модели.
+
+        Пустая ячейка необязательного поля становится None: clean_fields()
+        пропускает пустые значения, и без этого '' в числовом поле
+        дошло бы до bulk_create.
+        """
+        values = {}
+        for name, value in data.items():
+            field = model._meta.get_field(name)
+            if field.null and value in field.empty_values:
+                value = None
+            values[name] = field.to_python(value)
+        return values
+
+    def skip(self, number, reason, data):
+        self.stats["skipped"] += 1
+        self.stdout.write(f'Error! Row {number}: {reason}, "{data}"')
+
+    def count(self, batch):
+        for instance in batch:
+            self.stats["inserted" if instance.pk is None else "updated"] += 1
+
+    @transaction.atomic
+    def save(self, model, batch, update_fields):
+        # В PostgreSQL bulk_create заполняет pk вставленных объектов.
+        new = [instance for instance in batch if instance.pk is None]
+        changed = [instance for instance in batch if instance.pk is not None]
+        self.insert(model, new)
+        if changed and update_fields:
+            self.update(model, changed, update_fields)
+
+    def insert(self, model, instances):
+        """Вставляет пачку; если она нарушает уникальное ограничение,
+        строки вставляются по одной и конфликтующие пропускаются.
+        """
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(instances)
+        except IntegrityError:
+            pass
+        else:
+            self.stats["inserted"] += len(instances)
+            return
+        for instance in instances:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([instance])
+            except IntegrityError as err:
+                self.stats["skipped"] += 1
+                self.stdout.write(f'Error! "{instance}": {err}')
+                continue
+            self.stats["inserted"] += 1
+
+    def update(self, model, instances, update_fields):
+        """Обновляет строки, которые ещё есть в базе; удалённые после
+        чтения пропускаются.
+        """
+        pks = set(model.objects.select_for_update().filter(
+            pk__in=[instance.pk for instance in instances]
+        ).values_list("pk", flat=True))
+        existing = [
+            instance for instance in instances if instance.pk in pks]
+        model.objects.bulk_update(existing, update_fields)
+        self.stats["updated"] += len(existing)
+        self.stats["skipped"] += len(instances) - len(existing)
 
-        with open(file_path, "r", encoding="utf-8") as file:
-            reader = csv.reader(file, delimiter=",")
-            header = reader.__next__()
-            for row in reader:
-                data = {key: value for key, value in zip(header, row)}
-                try:
-                    model.objects.create(**data)
-                except IntegrityError as err:
-                    line = ", ".join(row)
-                    self.stdout.write(f'Error! {err}, "{line}"')
+    def report(self, elapsed, dry_run):
+        total = sum(self.stats.values())
+        rate = total / elapsed if elapsed else total
+        prefix = "Dry run: " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}inserted {self.stats['inserted']}, "
+            f"updated {self.stats['updated']}, "
+            f"skipped {self.stats['skipped']} "
+            f"({rate:.0f} rows/sec)"
+        ))
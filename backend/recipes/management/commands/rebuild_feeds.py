@@ -0,0 +1,22 @@
+"""
+Для заполнения лент подписок по текущим подпискам выполните команду:
+ python manage.py rebuild_feeds
+
+Нужна один раз после миграции и после изменения FEED_FANOUT_LIMIT
+или FEED_BACKFILL_SIZE.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Rebuild subscription feeds of all users"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        entries = rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt feeds with {entries} entries"
+        ))
@@ -0,0 +1,20 @@
+"""
+Для пересчёта счётчиков избранного, списков покупок, рецептов
+и подписчиков выполните команду:
+ python manage.py recount_counters
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized counters of recipes and users"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes, users = recount_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recounted {recipes} recipes and {users} users"
+        ))
@@ -0,0 +1,73 @@
+"""
+Для заполнения базы тестовыми данными выполните команду:
+ python manage.py seed --prefix load --users 1000 --recipes 100000
+ --favorites 50 --carts 10 --subscriptions 20
+
+Пользователи, теги, ингредиенты и рецепты получают имена вида
+<prefix>_<номер>. Одинаковые параметры и --seed дают одинаковые данные.
+Похожие рецепты после заполнения пересчитайте командой
+update_similar_recipes.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = "Generate users, recipes, favorites, carts and subscriptions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prefix", type=str, default="seed",
+            help="prefix of generated names")
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="random seed")
+        parser.add_argument(
+            "--users", type=int, default=50,
+            help="number of users")
+        parser.add_argument(
+            "--recipes", type=int, default=2000,
+            help="number of recipes")
+        parser.add_argument(
+            "--ingredients", type=int, default=200,
+            help="number of ingredients")
+        parser.add_argument(
+            "--tags", type=int, default=3,
+            help="number of tags")
+        parser.add_argument(
+            "--ingredients-per-recipe", type=int, default=5,
+            help="ingredients in every recipe")
+        parser.add_argument(
+            "--favorites", type=int, default=200,
+            help="favorite recipes of every user")
+        parser.add_argument(
+            "--carts", type=int, default=40,
+            help="recipes in the shopping cart of every user")
+        parser.add_argument(
+            "--subscriptions", type=int, default=25,
+            help="subscriptions of every user")
+
+    def handle(self, *args, **options):
+        seeder = Seeder(options["prefix"], options["seed"])
+        if seeder.exists():
+            raise CommandError(
+                f"Data with prefix {options['prefix']} already exists")
+        with transaction.atomic():
+            users = self.seed(seeder, options)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users and {options['recipes']} recipes"
+        ))
+
+    def seed(self, seeder, options):
+        return seeder.seed(
+            users=options["users"],
+            recipes=options["recipes"],
+            ingredients=options["ingredients"],
+            tags=options["tags"],
+            ingredients_per_recipe=options["ingredients_per_recipe"],
+            favorites_per_user=options["favorites"],
+            carts_per_user=options["carts"],
+            subscriptions_per_user=options["subscriptions"],
+        )
@@ -0,0 +1,21 @@
+"""
+Для пересчёта поисковых векторов рецептов выполните команду:
+ python manage.py update_search_vectors
+
+Нужна после массового изменения ингредиентов командой import и после
+правки рецептов в обход API. Вне PostgreSQL ничего не делает.
+"""
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recompute full-text search vectors of recipes"
+
+    def handle(self, *args, **options):
+        updated = update_search_vectors(Recipe.objects.all())
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated search vectors of {updated} recipes"
+        ))
@@ -0,0 +1,27 @@
+"""
+Для пересчёта похожих рецептов выполните команду:
+ python manage.py update_similar_recipes
+
+По умолчанию пересчитываются только рецепты, затронутые новыми
+добавлениями в избранное и новыми рецептами с прошлого запуска.
+С --full пересчитываются все рецепты; запускайте так периодически,
+чтобы учесть удаления из избранного и правки рецептов.
+"""
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import refresh_similar_recipes
+
+
+class Command(BaseCommand):
+    help = "Recompute the table of similar recipes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true",
+            help="recompute all recipes")
+
+    def handle(self, *args, **options):
+        updated = refresh_similar_recipes(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated similar recipes of {updated} recipes"
+        ))
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Value
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+MEMBERSHIP_KEY = 'membership:{}:{}'
+SOURCES = {
+    'favorites': (Favorite, 'recipe_id'),
+    'shopping_cart': (ShoppingCart, 'recipe_id'),
+    'subscriptions': (Subscription, 'author_id'),
+}
+MEMBERSHIP_KINDS = {model: kind for kind, (model, _) in SOURCES.items()}
+
+
+class UserMembership:
+    """Множества id избранных рецептов, рецептов в списке покупок
+    и авторов, на которых подписан пользователь.
+
+    Все ещё не загруженные множества читаются одним UNION-запросом при
+    первом обращении. При MEMBERSHIP_CACHE_TIMEOUT > 0 они также хранятся
+    в кэше Django между запросами; имеет смысл только с общим для
+    процессов бэкендом.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._loaded = {}
+
+    def get(self, kind):
+        if kind not in self._loaded:
+            self._load()
+        return self._loaded[kind]
+
+    def _load(self):
+        missing = [kind for kind in SOURCES if kind not in self._loaded]
+        if self.user_id is None:
+            self._loaded.update((kind, frozenset()) for kind in missing)
+            return
+        timeout = settings.MEMBERSHIP_CACHE_TIMEOUT
+        if timeout:
+            cached = cache.get_many(
+                [MEMBERSHIP_KEY.format(self.user_id, kind)
+                 for kind in missing])
+            for kind in missing:
+                key = MEMBERSHIP_KEY.format(self.user_id, kind)
+                if key in cached:
+                    self._loaded[kind] = cached[key]
+            missing = [kind for kind in missing if kind not in self._loaded]
+        if not missing:
+            return
+        ids = {kind: set() for kind in missing}
+        for kind, pk in self._query(missing):
+            ids[kind].add(pk)
+        loaded = {kind: frozenset(values) for kind, values in ids.items()}
+        self._loaded.update(loaded)
+        if timeout:
+            cache.set_many(
+                {MEMBERSHIP_KEY.format(self.user_id, kind): values
+                 for kind, values in loaded.items()},
+                timeout,
+            )
+
+    def _query(self, kinds):
+        querysets = []
+        for kind in kinds:
+            model, field = SOURCES[kind]
+            querysets.append(
+                model.objects.filter(user_id=self.user_id).annotate(
+                    kind=Value(kind, output_field=CharField())
+                ).values_list('kind', field).order_by()
+            )
+        return querysets[0].union(*querysets[1:], all=True)
+
+    @property
+    def favorites(self):
+        return self.get('favorites')
+
+    @property
+    def shopping_cart(self):
+        return self.get('shopping_cart')
+
+    @property
+    def subscriptions(self):
+        return self.get('subscriptions')
+
+
+def get_membership(request):
+    """UserMembership текущего пользователя, одна на запрос."""
+    membership = getattr(request, '_membership', None)
+    if membership is None:
+        membership = UserMembership(request.user.id)
+        request._membership = membership
+    return membership
+
+
+def invalidate_membership(user_id, kind):
+    cache.delete(MEMBERSHIP_KEY.format(user_id, kind))
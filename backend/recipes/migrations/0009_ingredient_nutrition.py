@@ -0,0 +1,38 @@
+# Generated by Django 3.2.6 on 2026-10-18 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='calories',
+            field=models.FloatField(blank=True, help_text='Калорийность одной единицы измерения, ккал', null=True, verbose_name='Calories'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbohydrates',
+            field=models.FloatField(blank=True, help_text='Углеводы в одной единице измерения, г', null=True, verbose_name='Carbohydrates'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fats',
+            field=models.FloatField(blank=True, help_text='Жиры в одной единице измерения, г', null=True, verbose_name='Fats'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='price',
+            field=models.FloatField(blank=True, help_text='Цена одной единицы измерения, руб.', null=True, verbose_name='Price'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='proteins',
+            field=models.FloatField(blank=True, help_text='Белки в одной единице измерения, г', null=True, verbose_name='Proteins'),
+        ),
+    ]
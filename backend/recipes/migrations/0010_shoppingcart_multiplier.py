@@ -0,0 +1,24 @@
+# Generated by Django 3.2.6 on 2026-10-18 03:03
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_ingredient_nutrition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='multiplier',
+            field=models.FloatField(default=1, help_text='Во сколько раз изменить количество ингредиентов', validators=[django.core.validators.MinValueValidator(0.1), django.core.validators.MaxValueValidator(100)], verbose_name='Servings multiplier'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated'),
+        ),
+    ]
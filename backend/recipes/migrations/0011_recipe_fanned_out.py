@@ -0,0 +1,35 @@
+# Generated by Django 3.2.6 on 2026-10-18 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_not_fanned_out(apps, schema_editor):
+    """Рецепты авторов, которые сейчас выше FEED_FANOUT_LIMIT,
+    не были разосланы в ленты."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.filter(
+        author__subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_counters'),
+        ('recipes', '0010_shoppingcart_multiplier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Fanned out to feeds'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', '-pub_date', '-id'], name='recipe_not_fanned_out_idx'),
+        ),
+        migrations.RunPython(
+            mark_not_fanned_out, migrations.RunPython.noop),
+    ]
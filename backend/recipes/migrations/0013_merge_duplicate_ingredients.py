@@ -0,0 +1,48 @@
+# Generated by Django 3.2.6 on 2026-10-18 16:20
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Сливает ингредиенты с одинаковыми названием и единицей измерения
+    в запись с наименьшим id; количества в одном рецепте складываются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(
+        total__gt=1).order_by()
+    for group in duplicates:
+        others = Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep'])
+        kept = {
+            row.recipe_id: row for row in IngredientInRecipe.objects.filter(
+                ingredient_id=group['keep'])
+        }
+        for row in IngredientInRecipe.objects.filter(
+                ingredient__in=others).order_by('id'):
+            if row.recipe_id in kept:
+                target = kept[row.recipe_id]
+                target.amount += row.amount
+                target.save(update_fields=['amount'])
+                row.delete()
+                continue
+            row.ingredient_id = group['keep']
+            row.save(update_fields=['ingredient'])
+            kept[row.recipe_id] = row
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_renditions_ready'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop),
+    ]
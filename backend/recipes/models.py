@@ -1,9 +1,14 @@
-from django.core.validators import MinValueValidator
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import Exists, OuterRef
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 
 from users.models import User
 
+MIN_MULTIPLIER = 0.1
+MAX_MULTIPLIER = 100
+
 
 class Tag(models.Model):
     name = models.CharField(
@@ -51,31 +56,86 @@ class Ingredient(models.Model):
         verbose_name='Units',
         help_text='Единицы измерения. Например: кг',
     )
+    calories = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Calories',
+        help_text='Калорийность одной единицы измерения, ккал',
+    )
+    proteins = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Proteins',
+        help_text='Белки в одной единице измерения, г',
+    )
+    fats = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Fats',
+        help_text='Жиры в одной единице измерения, г',
+    )
+    carbohydrates = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Carbohydrates',
+        help_text='Углеводы в одной единице измерения, г',
+    )
+    price = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Price',
+        help_text='Цена одной единицы измерения, руб.',
+    )
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Ingredient'
         verbose_name_plural = 'Ingredients'
+        constraints = (
+            models.UniqueConstraint(fields=('name', 'measurement_unit',),
+                                    name='unique_ingredient'),
+        )
 
     def __str__(self):
         return self.name
 
 
 class RecipeQuerySet(models.QuerySet):
-    def add_user_annotations(self, user_id):
-        return self.annotate(
-            is_favorited=Exists(
-                Favorite.objects.filter(
-                    user_id=user_id, recipe__pk=OuterRef('pk')
-                )
-            ),
-            is_in_shopping_cart=Exists(
-                ShoppingCart.objects.filter(
-                    user_id=user_id, recipe__pk=OuterRef('pk')
+    def add_read_relations(self):
+        return self.defer('search_vector').select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_in_recipe',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
                 )
             ),
         )
 
+    def top_per_author(self, author_ids, limit=None):
+        """Последние limit рецептов каждого автора одним запросом."""
+        queryset = self.filter(author__in=author_ids)
+        if limit is None:
+            return queryset
+        ranked = queryset.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).order_by().values(
+            'id', 'author_id', 'name', 'image', 'renditions_ready',
+            'cooking_time', 'pub_date', 'row_number',
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.model.objects.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+            f'ORDER BY pub_date DESC, id DESC',
+            (*params, limit),
+        )
+
 
 class Recipe(models.Model):
     author = models.ForeignKey(
@@ -119,13 +179,45 @@ class Recipe(models.Model):
         verbose_name='Publication date',
         auto_now_add=True,
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Search vector',
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Favorites count',
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Shopping carts count',
+    )
+    fanned_out = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Fanned out to feeds',
+    )
+    renditions_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Image renditions ready',
+    )
 
     objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id',)
         verbose_name = 'Recipe'
         verbose_name_plural = 'Recipes'
+        indexes = (
+            models.Index(fields=('-pub_date', '-id',),
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=('author', '-pub_date', '-id',),
+                         condition=models.Q(fanned_out=False),
+                         name='recipe_not_fanned_out_idx'),
+        )
 
     def __str__(self):
         return self.name
@@ -148,6 +240,10 @@ class TagRecipe(models.Model):
             models.UniqueConstraint(fields=('recipe', 'tag',),
                                     name='tag_recipe'),
         )
+        indexes = (
+            models.Index(fields=('tag', 'recipe',),
+                         name='tag_recipe_tag_idx'),
+        )
 
     def __str__(self):
         return f'{self.recipe} {self.tag}'
@@ -208,6 +304,12 @@ class UserRecipe(models.Model):
                 name='%(class)s_unique_favorite_user_recipes',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', '-created'),
+                name='%(class)s_user_created_idx',
+            ),
+        )
 
     def __str__(self):
         return f'User: {self.user}, recipe {self.recipe}'
@@ -218,4 +320,97 @@ class Favorite(UserRecipe):
 
 
 class ShoppingCart(UserRecipe):
-    pass
+    multiplier = models.FloatField(
+        default=1,
+        validators=(
+            MinValueValidator(MIN_MULTIPLIER),
+            MaxValueValidator(MAX_MULTIPLIER),
+        ),
+        verbose_name='Servings multiplier',
+        help_text='Во сколько раз изменить количество ингредиентов',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated',
+    )
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Recipe'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Similar recipe'
+    )
+    score = models.FloatField(verbose_name='Score')
+    computed = models.DateTimeField(
+        verbose_name='Computed at'
+    )
+
+    class Meta:
+        ordering = ('recipe', '-score')
+        verbose_name = 'Similar recipe'
+        verbose_name_plural = 'Similar recipes'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='unique_similar_recipe',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipe', '-score'),
+                name='similar_recipe_score_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='User'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Recipe'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Recipe Author'
+    )
+    pub_date = models.DateTimeField(verbose_name='Publication date')
+
+    class Meta:
+        ordering = ('user', '-pub_date', '-recipe')
+        verbose_name = 'Feed entry'
+        verbose_name_plural = 'Feed entries'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_entry_user_pub_date_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'User: {self.user}, recipe {self.recipe}'
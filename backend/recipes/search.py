@@ -0,0 +1,141 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections
+from django.db.models import (Case, Exists, F, IntegerField, OuterRef, Q,
+                              Subquery, Value, When)
+
+from recipes.cache import get_model_version
+from recipes.models import Ingredient, IngredientInRecipe
+
+SEARCH_CONFIG = 'russian'
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    """Отсортированный в памяти процесса индекс названий ингредиентов.
+
+    Строится при первом обращении, сбрасывается сигналами модели
+    Ingredient и при смене её версии в кэше (например, после импорта
+    в другом процессе), а также перестраивается не реже, чем раз
+    в INGREDIENT_INDEX_TTL секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = None
+        self._ingredients = None
+        self._version = None
+        self._built = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._keys = None
+            self._ingredients = None
+
+    def _get_entries(self):
+        ttl = settings.INGREDIENT_INDEX_TTL
+        version = get_model_version(Ingredient)
+        with self._lock:
+            if (self._keys is None or self._version != version
+                    or time.monotonic() - self._built > ttl):
+                ingredients = sorted(
+                    Ingredient.objects.only(
+                        'id', 'name', 'measurement_unit'
+                    ).iterator(),
+                    key=lambda ingredient: (
+                        normalize(ingredient.name), ingredient.id
+                    ),
+                )
+                self._keys = [
+                    normalize(ingredient.name) for ingredient in ingredients
+                ]
+                self._ingredients = ingredients
+                self._version = version
+                self._built = time.monotonic()
+            return self._keys, self._ingredients
+
+    def search(self, query):
+        """Сначала совпадения по началу названия, затем по подстроке."""
+        keys, ingredients = self._get_entries()
+        query = normalize(query)
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        contains = [
+            ingredient
+            for key, ingredient in zip(keys, ingredients)
+            if query in key and not key.startswith(query)
+        ]
+        return ingredients[start:end] + contains
+
+
+ingredient_index = IngredientIndex()
+
+
+def is_postgresql(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def build_search_vector(ingredient_in_recipe_model=IngredientInRecipe):
+    """Вектор рецепта: название (вес A), ингредиенты (B) и описание (C)."""
+    ingredient_names = ingredient_in_recipe_model.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredient_names), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipes):
+    """Пересчитывает Recipe.search_vector; вне PostgreSQL ничего не делает."""
+    if not is_postgresql(recipes):
+        return 0
+    return recipes.update(search_vector=build_search_vector())
+
+
+def search_recipes(queryset, text):
+    """Рецепты, подходящие под запрос, с аннотацией search_rank.
+
+    В PostgreSQL используется полнотекстовый поиск по search_vector с
+    русской морфологией, в остальных базах (SQLite при локальной
+    разработке) поиск по подстроке в названии, ингредиентах и описании.
+    """
+    if is_postgresql(queryset):
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+    in_ingredients = Exists(
+        IngredientInRecipe.objects.filter(
+            recipe=OuterRef('pk'), ingredient__name__icontains=text
+        )
+    )
+    return queryset.annotate(
+        in_ingredients=in_ingredients
+    ).filter(
+        Q(name__icontains=text) | Q(in_ingredients=True)
+        | Q(text__icontains=text)
+    ).annotate(
+        search_rank=Case(
+            When(name__icontains=text, then=Value(3)),
+            When(in_ingredients=True, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    )
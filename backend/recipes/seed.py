@@ -0,0 +1,178 @@
+import random
+from collections import defaultdict
+from hashlib import md5
+
+from django.conf import settings
+
+from recipes.counters import recount
+from recipes.models import (Favorite, FeedEntry, Ingredient,
+                            IngredientInRecipe, Recipe, ShoppingCart, Tag,
+                            TagRecipe)
+from recipes.search import update_search_vectors
+from users.models import Subscription, User
+
+BATCH_SIZE = 1000
+IMAGE = 'recipes/media/image/seed.png'
+MULTIPLIERS = (0.5, 1, 1, 1, 2)
+
+
+class Seeder:
+    """Генератор данных для нагрузочных тестов.
+
+    Все объекты создаются через bulk_create пачками по BATCH_SIZE и
+    получают имена с префиксом prefix, поэтому их легко найти и удалить.
+    Одинаковый random_seed даёт одинаковые данные.
+    """
+
+    def __init__(self, prefix, random_seed=0, batch_size=BATCH_SIZE):
+        self.prefix = prefix
+        self.random = random.Random(random_seed)
+        self.batch_size = batch_size
+
+    def name(self, number):
+        return f'{self.prefix}_{number}'
+
+    def exists(self):
+        return User.objects.filter(
+            username__startswith=f'{self.prefix}_').exists()
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def seed(self, users, recipes, ingredients, tags, ingredients_per_recipe,
+             favorites_per_user, carts_per_user, subscriptions_per_user):
+        """Создаёт данные и возвращает пользователей в порядке номеров."""
+        user_ids = self.create_users(users)
+        tag_ids = self.create_tags(tags)
+        ingredient_ids = self.create_ingredients(ingredients)
+        recipe_ids = self.create_recipes(recipes, user_ids)
+        self.bulk_create(TagRecipe, (
+            TagRecipe(recipe_id=recipe_id, tag_id=self.random.choice(tag_ids))
+            for recipe_id in recipe_ids
+        ))
+        self.bulk_create(IngredientInRecipe, (
+            IngredientInRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.random.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in self.random.sample(
+                ingredient_ids,
+                min(ingredients_per_recipe, len(ingredient_ids)))
+        ))
+        self.bulk_create(Favorite, (
+            Favorite(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in self.random.sample(
+                recipe_ids, min(favorites_per_user, len(recipe_ids)))
+        ))
+        self.bulk_create(ShoppingCart, (
+            ShoppingCart(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                multiplier=self.random.choice(MULTIPLIERS),
+            )
+            for user_id in user_ids
+            for recipe_id in self.random.sample(
+                recipe_ids, min(carts_per_user, len(recipe_ids)))
+        ))
+        subscriptions = [
+            (user_id, author_id)
+            for number, user_id in enumerate(user_ids)
+            for author_id in self.pick_authors(
+                user_ids, number, subscriptions_per_user)
+        ]
+        self.bulk_create(Subscription, (
+            Subscription(user_id=user_id, author_id=author_id)
+            for user_id, author_id in subscriptions
+        ))
+        # Пересчитываются только созданные объекты: полный пересчёт
+        # заблокировал бы все строки users и recipes до конца транзакции.
+        for model in (Favorite, ShoppingCart):
+            recount(model, recipe_ids)
+        for model in (Recipe, Subscription):
+            recount(model, user_ids)
+        seeded = Recipe.objects.filter(pk__in=recipe_ids)
+        update_search_vectors(seeded)
+        self.create_feeds(seeded, subscriptions)
+        return list(User.objects.filter(pk__in=user_ids).order_by('pk'))
+
+    def pick_authors(self, user_ids, number, count):
+        others = user_ids[:number] + user_ids[number + 1:]
+        return self.random.sample(others, min(count, len(others)))
+
+    def create_users(self, count):
+        self.bulk_create(User, (
+            User(
+                username=self.name(number),
+                email=f'{self.name(number)}@example.com',
+                first_name='Seed',
+                last_name=str(number),
+            )
+            for number in range(count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_tags(self, count):
+        self.bulk_create(Tag, (
+            Tag(
+                name=self.name(number),
+                color='#' + md5(self.name(number).encode()).hexdigest()[:6],
+                slug=self.name(number),
+            )
+            for number in range(count)
+        ))
+        return list(Tag.objects.filter(
+            slug__startswith=f'{self.prefix}_').values_list('pk', flat=True))
+
+    def create_ingredients(self, count):
+        self.bulk_create(Ingredient, (
+            Ingredient(name=self.name(number), measurement_unit='г')
+            for number in range(count)
+        ))
+        return list(Ingredient.objects.filter(
+            name__startswith=f'{self.prefix}_').values_list('pk', flat=True))
+
+    def create_recipes(self, count, user_ids):
+        self.bulk_create(Recipe, (
+            Recipe(
+                author_id=user_ids[number % len(user_ids)],
+                name=self.name(number),
+                text=self.prefix,
+                image=IMAGE,
+                cooking_time=self.random.randint(1, 120),
+            )
+            for number in range(count)
+        ))
+        return list(Recipe.objects.filter(
+            author_id__in=user_ids).order_by('pk').values_list(
+            'pk', flat=True))
+
+    def create_feeds(self, recipes, subscriptions):
+        """Ленты подписок как после backfill при подписке."""
+        latest = defaultdict(list)
+        for recipe_id, author_id, pub_date in recipes.order_by(
+                '-pub_date', '-id').values_list('id', 'author_id', 'pub_date'):
+            if len(latest[author_id]) < settings.FEED_BACKFILL_SIZE:
+                latest[author_id].append((recipe_id, pub_date))
+        subscribers = defaultdict(int)
+        for _, author_id in subscriptions:
+            subscribers[author_id] += 1
+        recipes.filter(author_id__in=[
+            author_id for author_id, count in subscribers.items()
+            if count > settings.FEED_FANOUT_LIMIT
+        ]).update(fanned_out=False)
+        self.bulk_create(FeedEntry, (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id, author_id in subscriptions
+            if subscribers[author_id] <= settings.FEED_FANOUT_LIMIT
+            for recipe_id, pub_date in latest[author_id]
+        ))
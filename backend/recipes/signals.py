@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.cache import bump_model_version
+from recipes.counters import COUNTERS, change_counters
+from recipes.feed import backfill, fan_out, remove
+from recipes.images import get_missing_renditions, schedule_renditions
+from recipes.membership import MEMBERSHIP_KINDS, invalidate_membership
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.search import ingredient_index, update_search_vectors
+from users.models import Subscription
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Ingredient)
+def update_recipes_search_vectors(instance, created, **kwargs):
+    if not created:
+        update_search_vectors(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def bump_reference_version(sender, **kwargs):
+    bump_model_version(sender)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscription)
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        _, field, _ = COUNTERS[sender]
+        change_counters(sender, (getattr(instance, field),), 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscription)
+def decrement_counter(sender, instance, **kwargs):
+    _, field, _ = COUNTERS[sender]
+    change_counters(sender, (getattr(instance, field),), -1)
+
+
+@receiver(post_save, sender=Recipe)
+def build_image_renditions(instance, **kwargs):
+    name = instance.image.name
+    if instance.renditions_ready and get_missing_renditions(name):
+        # Картинка заменена: до построения копий отдаётся оригинал.
+        Recipe.objects.filter(pk=instance.pk).update(renditions_ready=False)
+        instance.renditions_ready = False
+    if not instance.renditions_ready:
+        transaction.on_commit(lambda: schedule_renditions(name))
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscription)
+def invalidate_user_membership(sender, instance, **kwargs):
+    user_id, kind = instance.user_id, MEMBERSHIP_KINDS[sender]
+    transaction.on_commit(lambda: invalidate_membership(user_id, kind))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(instance, created, **kwargs):
+    if created:
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_feed(instance, created, **kwargs):
+    if created:
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def clean_feed(instance, **kwargs):
+    remove(instance.user_id, instance.author_id)
@@ -0,0 +1,150 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from recipes.models import (Favorite, IngredientInRecipe, Recipe,
+                            SimilarRecipe, TagRecipe)
+
+FAVORITES_WEIGHT = 1.0
+INGREDIENTS_WEIGHT = 0.5
+TAGS_WEIGHT = 0.2
+# Ингредиенты, которые есть больше чем в этой доле рецептов (соль, вода),
+# но не меньше чем в COMMON_INGREDIENT_MIN рецептах, не используются для
+# поиска кандидатов.
+COMMON_INGREDIENT_SHARE = 0.05
+COMMON_INGREDIENT_MIN = 100
+BATCH_SIZE = 500
+
+
+def jaccard(shared, first, second):
+    union = first + second - shared
+    return shared / union if union else 0.0
+
+
+class SimilarityModel:
+    """Разреженные связи рецептов с пользователями, ингредиентами и тегами.
+
+    Похожесть рецепта на другой складывается из косинусной меры по общим
+    добавлениям в избранное и мер Жаккара по общим ингредиентам и тегам.
+    Теги только уточняют оценку кандидатов, найденных по избранному или
+    ингредиентам.
+    """
+
+    def __init__(self):
+        self.fans = defaultdict(set)
+        self.favorites = defaultdict(set)
+        for recipe_id, user_id in Favorite.objects.values_list(
+                'recipe_id', 'user_id').iterator():
+            self.fans[recipe_id].add(user_id)
+            self.favorites[user_id].add(recipe_id)
+        self.ingredients = defaultdict(set)
+        self.uses = defaultdict(set)
+        for recipe_id, ingredient_id in IngredientInRecipe.objects.values_list(
+                'recipe_id', 'ingredient_id').iterator():
+            self.ingredients[recipe_id].add(ingredient_id)
+            self.uses[ingredient_id].add(recipe_id)
+        self.tags = defaultdict(set)
+        for recipe_id, tag_id in TagRecipe.objects.values_list(
+                'recipe_id', 'tag_id').iterator():
+            self.tags[recipe_id].add(tag_id)
+        self.common_limit = max(
+            COMMON_INGREDIENT_MIN,
+            COMMON_INGREDIENT_SHARE * len(self.ingredients),
+        )
+
+    def scores(self, recipe_id):
+        scores = Counter()
+        fans = self.fans.get(recipe_id, set())
+        shared_fans = Counter()
+        for user_id in fans:
+            shared_fans.update(self.favorites[user_id])
+        for other_id, shared in shared_fans.items():
+            scores[other_id] += FAVORITES_WEIGHT * shared / math.sqrt(
+                len(fans) * len(self.fans[other_id]))
+        ingredients = self.ingredients.get(recipe_id, set())
+        shared_ingredients = Counter()
+        for ingredient_id in ingredients:
+            if len(self.uses[ingredient_id]) <= self.common_limit:
+                shared_ingredients.update(self.uses[ingredient_id])
+        for other_id, shared in shared_ingredients.items():
+            scores[other_id] += INGREDIENTS_WEIGHT * jaccard(
+                shared, len(ingredients), len(self.ingredients[other_id]))
+        scores.pop(recipe_id, None)
+        tags = self.tags.get(recipe_id, set())
+        for other_id in scores:
+            other_tags = self.tags.get(other_id, set())
+            scores[other_id] += TAGS_WEIGHT * jaccard(
+                len(tags & other_tags), len(tags), len(other_tags))
+        return scores
+
+    def top(self, recipe_id, count):
+        return heapq.nlargest(
+            count, self.scores(recipe_id).items(),
+            key=lambda item: (item[1], item[0]),
+        )
+
+
+def get_changed_recipe_ids(since):
+    """Рецепты, соседи которых могли измениться после since.
+
+    Учитываются новые рецепты и все рецепты в избранном пользователей,
+    добавивших что-то в избранное. Удаления и правки рецептов подхватывает
+    только полный пересчёт.
+    """
+    users = Favorite.objects.filter(created__gt=since).values('user_id')
+    changed = set(
+        Favorite.objects.filter(user_id__in=users).values_list(
+            'recipe_id', flat=True)
+    )
+    changed.update(
+        Recipe.objects.filter(pub_date__gt=since).values_list('id', flat=True)
+    )
+    return changed
+
+
+def get_outdated_recipe_ids(full=False):
+    """Рецепты для пересчёта: все или изменённые с прошлого пересчёта."""
+    since = None
+    if not full:
+        since = SimilarRecipe.objects.aggregate(
+            last=Max('computed'))['last']
+    if since is None:
+        return set(Recipe.objects.values_list('id', flat=True))
+    return get_changed_recipe_ids(since)
+
+
+def refresh_similar_recipes(full=False, recipe_ids=None):
+    """Пересчитывает таблицу SimilarRecipe и возвращает число рецептов.
+
+    С recipe_ids пересчитываются соседи только этих рецептов.
+    """
+    started = timezone.now()
+    if recipe_ids is None:
+        recipe_ids = get_outdated_recipe_ids(full)
+    model = SimilarityModel()
+    count = settings.SIMILAR_RECIPES_COUNT
+    pending = iter(sorted(recipe_ids))
+    while True:
+        batch = list(islice(pending, BATCH_SIZE))
+        if not batch:
+            break
+        rows = [
+            SimilarRecipe(
+                recipe_id=recipe_id,
+                similar_id=similar_id,
+                score=score,
+                computed=started,
+            )
+            for recipe_id in batch
+            for similar_id, score in model.top(recipe_id, count)
+        ]
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(recipe_id__in=batch).delete()
+            SimilarRecipe.objects.bulk_create(rows)
+    return len(recipe_ids)
@@ -0,0 +1,50 @@
+from itertools import groupby
+from operator import itemgetter
+
+# Единица измерения -> (базовая единица, множитель).
+UNITS = {
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'ч. л.': ('мл', 5),
+    'ст. л.': ('мл', 15),
+    'стакан': ('мл', 200),
+}
+
+
+def normalize_unit(unit):
+    """Базовая единица и множитель; неизвестные единицы не меняются."""
+    unit = unit.strip(' "')
+    return UNITS.get(unit, (unit, 1))
+
+
+def normalize_amount(amount):
+    """Округляет количество до сотых, целые значения возвращает как int."""
+    amount = round(amount, 2)
+    return int(amount) if amount == int(amount) else amount
+
+
+def merge_units(rows):
+    """Объединяет строки (name, amount, unit) одного ингредиента
+    в совместимых единицах, например граммы и килограммы.
+
+    В базовую единицу переводятся только группы, где у ингредиента
+    несколько совместимых единиц; иначе единица остаётся исходной.
+    Строки должны быть отсортированы по названию.
+    """
+    for name, group in groupby(rows, key=itemgetter(0)):
+        totals = {}
+        for _, amount, unit in group:
+            amounts = totals.setdefault(normalize_unit(unit)[0], {})
+            amounts[unit] = amounts.get(unit, 0) + amount
+        for base_unit, amounts in totals.items():
+            if len(amounts) == 1:
+                [(unit, amount)] = amounts.items()
+                yield name, normalize_amount(amount), unit
+                continue
+            amount = sum(
+                amount * normalize_unit(unit)[1]
+                for unit, amount in amounts.items()
+            )
+            yield name, normalize_amount(amount), base_unit
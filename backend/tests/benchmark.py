@@ -0,0 +1,110 @@
+"""Замеры числа запросов к базе и времени ответов API для тестов
+производительности.
+"""
+import json
+import subprocess
+import time
+from collections import namedtuple
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+REPEAT = 20
+
+Measurement = namedtuple('Measurement', 'url queries p50 p95')
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = max(0, int(round(percent / 100 * len(values))) - 1)
+    return values[index]
+
+
+def consume(response):
+    """Дочитывает потоковый ответ, чтобы его время попало в замер."""
+    if response.streaming:
+        b''.join(response.streaming_content)
+
+
+def send(client, method, url, data=None):
+    """Один запрос: (время ответа в мс, число запросов к базе)."""
+    # Журнал запросов ограничен 9000 записей; после переполнения
+    # CaptureQueriesContext перестаёт видеть новые запросы.
+    reset_queries()
+    with CaptureQueriesContext(connection) as context:
+        start = time.perf_counter()
+        response = getattr(client, method)(url, data, format='json')
+        consume(response)
+        elapsed = (time.perf_counter() - start) * 1000
+    assert response.status_code < 400, (
+        f'{method.upper()} {url}: {response.status_code}')
+    return elapsed, len(context.captured_queries)
+
+
+def summarize(url, timings, queries):
+    return Measurement(
+        url, max(queries), percentile(timings, 50), percentile(timings, 95))
+
+
+def measure(client, url, method='get', payload=None, repeat=REPEAT,
+            label=None):
+    """Отправляет запрос repeat раз после одного прогревочного.
+
+    payload(iteration) возвращает тело запроса. queries — наибольшее
+    число запросов к базе, p50 и p95 — время ответа в миллисекундах.
+    """
+    send(client, method, url, payload(0) if payload else None)
+    timings, queries = zip(*(
+        send(client, method, url, payload(iteration) if payload else None)
+        for iteration in range(1, repeat + 1)
+    ))
+    return summarize(
+        label or f'{method.upper()} {url}', timings, queries)
+
+
+def get_revision():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, check=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(path, results, options):
+    """Сохраняет результаты вместе с версией кода и параметрами."""
+    data = {
+        'revision': get_revision(),
+        'created': timezone.now().isoformat(),
+        'options': options,
+        'results': {
+            test: [measurement._asdict() for measurement in measurements]
+            for test, measurements in results.items()
+        },
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+
+
+def compare(path, results):
+    """Строки с разницей результатов и сохранённых ранее в path."""
+    with open(path, 'r', encoding='utf-8') as file:
+        previous = json.load(file)
+    before = {
+        (test, result['url']): result
+        for test, test_results in previous['results'].items()
+        for result in test_results
+    }
+    yield f"Compared with {previous.get('revision')}:"
+    for test, measurements in results.items():
+        for result in measurements:
+            old = before.get((test, result.url))
+            if old is None:
+                continue
+            yield (
+                f'{result.url}: queries {result.queries - old["queries"]:+d}'
+                f', p50 {result.p50 - old["p50"]:+.1f} ms'
+                f', p95 {result.p95 - old["p95"]:+.1f} ms'
+            )
@@ -0,0 +1,157 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from tests import benchmark
+from users.models import Subscription, User
+
+IMAGE = 'recipes/media/image/test.png'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'тесты производительности')
+    group.addoption(
+        '--benchmark-recipes', type=int, default=2000,
+        help='рецептов в сгенерированных данных')
+    group.addoption(
+        '--benchmark-max-p95', type=float, default=500,
+        help='наибольшее допустимое p95 времени ответа, мс')
+    group.addoption(
+        '--benchmark-json', default=None,
+        help='сохранить результаты замеров в этот файл')
+    group.addoption(
+        '--benchmark-compare', default=None,
+        help='вывести разницу с результатами, сохранёнными --benchmark-json')
+
+
+def pytest_configure(config):
+    # Имя теста -> список Measurement, заполняется фикстурой check_benchmark.
+    config.benchmark_results = {}
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    path = config.getoption('--benchmark-json')
+    if path and config.benchmark_results:
+        benchmark.save(path, config.benchmark_results, {
+            'recipes': config.getoption('--benchmark-recipes'),
+            'max_p95': config.getoption('--benchmark-max-p95'),
+        })
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    path = config.getoption('--benchmark-compare')
+    if path and config.benchmark_results:
+        terminalreporter.section('benchmark')
+        for line in benchmark.compare(path, config.benchmark_results):
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture
+def make_user():
+    def make_user(name):
+        return User.objects.create_user(
+            username=name,
+            email=f'{name}@example.com',
+            first_name=name,
+            last_name=name,
+            password='Secret-pass-123',
+        )
+    return make_user
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('user')
+
+
+@pytest.fixture
+def author(make_user):
+    return make_user('author')
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def tags():
+    return [
+        Tag.objects.create(name=name, color=color, slug=slug)
+        for name, color, slug in (
+            ('Завтрак', '#E26C2D', 'breakfast'),
+            ('Обед', '#49B64E', 'lunch'),
+            ('Ужин', '#8775D2', 'dinner'),
+        )
+    ]
+
+
+@pytest.fixture
+def ingredients():
+    return [
+        Ingredient.objects.create(name=name, measurement_unit=unit)
+        for name, unit in (
+            ('мука', 'г'),
+            ('молоко', 'мл'),
+            ('яйца', 'шт.'),
+            ('сахар', 'кг'),
+            ('соль', 'г'),
+        )
+    ]
+
+
+@pytest.fixture
+def make_recipe(tags, ingredients):
+    def make_recipe(author, number=0, ingredients_count=3, image=IMAGE):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f'Рецепт {number}',
+            text='Описание',
+            image=image,
+            cooking_time=number + 1,
+        )
+        recipe.tags.set(tags[:2])
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient=ingredient, amount=index + 1)
+            for index, ingredient in enumerate(
+                ingredients[:ingredients_count])
+        )
+        return recipe
+    return make_recipe
+
+
+@pytest.fixture
+def make_recipes(make_recipe, make_user, user):
+    """count рецептов двух авторов; на первого user подписан, часть
+    рецептов в избранном и в списке покупок user.
+    """
+    def make_recipes(count):
+        authors = [make_user(f'author{number}') for number in range(2)]
+        Subscription.objects.create(user=user, author=authors[0])
+        recipes = [
+            make_recipe(authors[number % 2], number)
+            for number in range(count)
+        ]
+        for recipe in recipes[::2]:
+            Favorite.objects.create(user=user, recipe=recipe)
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+        return recipes
+    return make_recipes
@@ -0,0 +1,30 @@
+"""Настройки тестов.
+
+По умолчанию — SQLite-файл во временном каталоге: файл, а не база
+в памяти, нужен тестам с запросами из потоков, каждый поток открывает
+своё соединение. С заданным DB_HOST тесты идут на PostgreSQL из
+DATABASES основных настроек; тесты гонок выполняются только на нём.
+"""
+import os
+import tempfile
+
+from backend.settings import *  # noqa: F401,F403
+
+TEST_DIR = os.path.join(tempfile.gettempdir(), 'foodgram_tests')
+os.makedirs(TEST_DIR, exist_ok=True)
+
+if not os.getenv('DB_HOST'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(TEST_DIR, 'db.sqlite3'),
+            'OPTIONS': {'timeout': 30},
+            'TEST': {'NAME': os.path.join(TEST_DIR, 'test_db.sqlite3')},
+        }
+    }
+
+MEDIA_ROOT = os.path.join(TEST_DIR, 'media')
+
+IMAGE_RENDITION_WORKERS = 0
+
+PASSWORD_HASHERS = ('django.contrib.auth.hashers.MD5PasswordHasher',)
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import REVOKED_KEY, token_cache
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'test_cache',
+    }
+}
+
+
+@pytest.fixture
+def token_client(user):
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.mark.django_db
+def test_local_cache_checks_token_in_database(token_client, user):
+    assert token_client.get('/api/users/me/').status_code == 200
+    # Выход в другом процессе: сигналы этого процесса не срабатывают.
+    tokens = Token.objects.filter(user=user)
+    tokens._raw_delete(tokens.db)
+    assert token_client.get('/api/users/me/').status_code == 401
+    assert token_cache.stats()['size'] == 0
+
+
+@pytest.mark.django_db
+def test_shared_cache_revokes_cached_token(token_client, user):
+    with override_settings(CACHES=SHARED_CACHES):
+        call_command('createcachetable')
+        assert token_client.get('/api/users/me/').status_code == 200
+        hits = token_cache.stats()['hits']
+        assert token_client.get('/api/users/me/').status_code == 200
+        assert token_cache.stats()['hits'] == hits + 1
+        # Выход в другом процессе: там удаляется токен и ставится метка
+        # отзыва, локальный кэш токенов этого процесса не трогается.
+        tokens = Token.objects.filter(user=user)
+        tokens._raw_delete(tokens.db)
+        cache.set(REVOKED_KEY.format(user.pk), time.time_ns())
+        assert token_client.get('/api/users/me/').status_code == 401
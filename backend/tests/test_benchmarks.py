@@ -0,0 +1,284 @@
+"""Число запросов к базе и p95 времени ответа на сгенерированных данных.
+
+Данные создаются генератором команды seed один раз на модуль и
+удаляются после его тестов; запросы идут от имени первого созданного
+пользователя. Объём и порог p95 задаются параметрами --benchmark-recipes
+и --benchmark-max-p95, с --benchmark-json результаты сохраняются в файл,
+с --benchmark-compare выводится разница с сохранённым ранее.
+"""
+import base64
+import io
+
+import pytest
+from django.conf import settings
+from django.db import transaction
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.seed import Seeder
+from recipes.similarity import refresh_similar_recipes
+from tests.benchmark import measure, send, summarize
+from users.models import User
+
+PREFIX = 'benchmark'
+PAGE_SIZES = (6, 24, 96)
+RECIPES_LIMITS = (1, 3, 10)
+INGREDIENTS_IN_PAYLOAD = (5, 30)
+SHOPPING_CART_FORMATS = ('txt', 'csv', 'pdf')
+BATCH_SIZE = 50
+BATCH_REPEAT = 5
+
+
+@pytest.fixture(scope='module')
+def seeded(request, django_db_setup, django_db_blocker):
+    """Пользователи сгенерированных данных в порядке номеров."""
+    recipes = request.config.getoption('--benchmark-recipes')
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            users = Seeder(PREFIX).seed(
+                users=max(10, recipes // 40),
+                recipes=recipes,
+                ingredients=200,
+                tags=3,
+                ingredients_per_recipe=5,
+                favorites_per_user=50,
+                carts_per_user=10,
+                subscriptions_per_user=5,
+            )
+            refresh_similar_recipes(recipe_ids=Recipe.objects.filter(
+                author__in=users).values_list('id', flat=True))
+    yield users
+    with django_db_blocker.unblock():
+        User.objects.filter(username__startswith=f'{PREFIX}_').delete()
+        Tag.objects.filter(slug__startswith=f'{PREFIX}_').delete()
+        Ingredient.objects.filter(name__startswith=f'{PREFIX}_').delete()
+
+
+@pytest.fixture
+def check_benchmark(request):
+    """Сохраняет замеры теста и проверяет их.
+
+    Число запросов должно быть равно queries, а без него — одинаковым во
+    всех замерах, если same_queries; p95 каждого замера не больше
+    --benchmark-max-p95. Замеры recorded только сохраняются.
+    """
+    max_p95 = request.config.getoption('--benchmark-max-p95')
+
+    def check(measurements, queries=None, same_queries=True, recorded=()):
+        request.config.benchmark_results[request.node.name] = [
+            *measurements, *recorded]
+        if queries is None and same_queries:
+            assert len({result.queries for result in measurements}) == 1, (
+                measurements)
+        for result in measurements:
+            if queries is not None:
+                assert result.queries == queries, result
+            assert result.p95 <= max_p95, result
+    return check
+
+
+def make_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()).decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('authenticated, queries', ((False, 5), (True, 6)))
+def test_recipe_list(authenticated, queries, seeded, check_benchmark):
+    client = make_client(seeded[0] if authenticated else None)
+    check_benchmark([
+        measure(client, f'/api/recipes/?limit={size}')
+        for size in PAGE_SIZES
+    ], queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('authenticated, queries', ((False, 4), (True, 5)))
+def test_recipe_detail(authenticated, queries, seeded, check_benchmark):
+    client = make_client(seeded[0] if authenticated else None)
+    recipes = Recipe.objects.filter(author__in=seeded)[:3]
+    check_benchmark([
+        measure(client, f'/api/recipes/{recipe.id}/') for recipe in recipes
+    ], queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', (
+    f'tags={PREFIX}_0&tags={PREFIX}_1',
+    f'search={PREFIX}',
+    'is_favorited=1',
+    'is_in_shopping_cart=1',
+))
+def test_recipe_filters(query, seeded, check_benchmark):
+    client = make_client(seeded[0])
+    check_benchmark([
+        measure(client, f'/api/recipes/?limit={size}&{query}')
+        for size in PAGE_SIZES
+    ])
+
+
+@pytest.mark.django_db
+def test_similar_recipes(seeded, check_benchmark):
+    client = make_client(seeded[0])
+    recipes = Recipe.objects.filter(author__in=seeded)[:3]
+    check_benchmark([
+        measure(client, f'/api/recipes/{recipe.id}/similar/')
+        for recipe in recipes
+    ])
+
+
+@pytest.mark.django_db
+def test_feed(seeded, check_benchmark):
+    client = make_client(seeded[0])
+    check_benchmark([
+        measure(client, f'/api/recipes/feed/?limit={size}')
+        for size in PAGE_SIZES
+    ])
+
+
+@pytest.mark.django_db
+def test_subscriptions(seeded, check_benchmark):
+    client = make_client(seeded[0])
+    check_benchmark([
+        measure(
+            client,
+            f'/api/users/subscriptions/?limit={size}'
+            f'&recipes_limit={recipes_limit}',
+        )
+        for size in PAGE_SIZES
+        for recipes_limit in RECIPES_LIMITS
+    ])
+
+
+@pytest.mark.django_db
+def test_ingredient_search(seeded, check_benchmark):
+    client = make_client()
+    check_benchmark([
+        measure(client, f'/api/ingredients/?name={name}')
+        for name in (f'{PREFIX}_1', f'{PREFIX}_12')
+    ])
+
+
+@pytest.mark.django_db
+def test_shopping_cart(seeded, check_benchmark):
+    client = make_client(seeded[0])
+    check_benchmark([
+        measure(client, f'/api/recipes/download_shopping_cart/?type={type}')
+        for type in SHOPPING_CART_FORMATS
+    ] + [measure(client, '/api/recipes/shopping_cart_summary/')])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method', ('post', 'patch'))
+def test_recipe_write(method, seeded, check_benchmark):
+    """Запись рецепта, у которого от итерации к итерации часть
+    ингредиентов удаляется, часть меняет количество и часть добавляется.
+    """
+    user = seeded[0]
+    client = make_client(user)
+    url = '/api/recipes/'
+    if method == 'patch':
+        url += f'{Recipe.objects.filter(author=user).first().id}/'
+    ingredient_ids = list(Ingredient.objects.filter(
+        name__startswith=f'{PREFIX}_').values_list('id', flat=True))
+    tag_ids = list(Tag.objects.filter(
+        slug__startswith=f'{PREFIX}_').values_list('id', flat=True))
+    image = make_image()
+
+    def payload(count):
+        def payload(iteration):
+            shift = iteration * count // 3
+            return {
+                'ingredients': [
+                    {
+                        'id': ingredient_ids[
+                            (shift + number) % len(ingredient_ids)],
+                        'amount': iteration % 100 + 1,
+                    }
+                    for number in range(count)
+                ],
+                'tags': tag_ids[iteration % 2:],
+                'image': image,
+                'name': PREFIX,
+                'text': PREFIX,
+                'cooking_time': 10,
+            }
+        return payload
+
+    check_benchmark([
+        measure(
+            client, url, method, payload(count),
+            label=f'{method.upper()} {url} ({count} ingredients)',
+        )
+        for count in INGREDIENTS_IN_PAYLOAD
+    ])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('item_url, bulk_url', (
+    ('/api/recipes/{}/favorite/', '/api/recipes/favorite/bulk/'),
+    ('/api/recipes/{}/shopping_cart/', '/api/recipes/shopping_cart/bulk/'),
+    ('/api/users/{}/subscribe/', '/api/users/subscribe/bulk/'),
+))
+def test_batch_toggles(item_url, bulk_url, seeded, check_benchmark):
+    """Добавление и удаление BATCH_SIZE объектов по одному запросу на
+    объект и одним пакетным запросом: пакетный должен быть быстрее.
+    Время — на все объекты, queries — наибольшее на один HTTP-запрос.
+    """
+    user = seeded[0]
+    client = make_client(user)
+    size = min(BATCH_SIZE, settings.BULK_MAX_SIZE)
+    if 'users' in item_url:
+        targets = User.objects.exclude(pk=user.pk).exclude(
+            subscribed_to__user=user)
+    else:
+        targets = Recipe.objects.exclude(
+            recipes_favorites__user=user
+        ).exclude(recipes_shoppingcarts__user=user)
+    ids = list(targets.values_list('id', flat=True)[:size])
+    requests = {
+        ('item', 'post'): [(item_url.format(pk), None) for pk in ids],
+        ('item', 'delete'): [(item_url.format(pk), None) for pk in ids],
+        ('batch', 'post'): [(bulk_url, {'ids': ids})],
+        ('batch', 'delete'): [(bulk_url, {'ids': ids})],
+    }
+    timings = {key: [] for key in requests}
+    queries = {key: [] for key in requests}
+    for _ in range(BATCH_REPEAT):
+        for (mode, method), key_requests in requests.items():
+            results = [
+                send(client, method, url, data)
+                for url, data in key_requests
+            ]
+            timings[mode, method].append(sum(
+                elapsed for elapsed, _ in results))
+            queries[mode, method].extend(count for _, count in results)
+    labels = {
+        'item': f'{item_url} x{len(ids)}',
+        'batch': f'{bulk_url} ({len(ids)} ids)',
+    }
+    measurements = {
+        (mode, method): summarize(
+            f'{method.upper()} {labels[mode]}',
+            timings[mode, method], queries[mode, method])
+        for mode, method in requests
+    }
+    for method in ('post', 'delete'):
+        assert (measurements['batch', method].p50
+                < measurements['item', method].p50), measurements
+    check_benchmark(
+        [measurements['batch', method] for method in ('post', 'delete')],
+        same_queries=False,
+        recorded=[
+            measurements['item', method] for method in ('post', 'delete')],
+    )
@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+
+from backend.postgresql.base import DatabaseWrapper, close_pools
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='бэкенд backend.postgresql проверяется только на PostgreSQL',
+)
+
+
+def make_wrapper(alias, **options):
+    settings_dict = {**connection.settings_dict, **options}
+    return DatabaseWrapper(settings_dict, alias)
+
+
+def run_request(wrapper):
+    """Запрос к базе между сигналами начала и конца запроса."""
+    wrapper.close_if_unusable_or_obsolete()
+    try:
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+    finally:
+        wrapper.close_if_unusable_or_obsolete()
+
+
+def terminate(pid):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_terminate_backend(%s)', (pid,))
+
+
+@pytest.mark.django_db
+def test_health_check_replaces_dropped_connection():
+    wrapper = make_wrapper(
+        'health_check', CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+    try:
+        pid = run_request(wrapper)
+        assert run_request(wrapper) == pid
+        terminate(pid)
+        assert run_request(wrapper) != pid
+    finally:
+        wrapper.close()
+
+
+@pytest.mark.django_db
+def test_pool_reuses_and_checks_connections():
+    wrapper = make_wrapper(
+        'pool', CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True, POOL_SIZE=1)
+    try:
+        pid = run_request(wrapper)
+        assert run_request(wrapper) == pid
+        terminate(pid)
+        assert run_request(wrapper) != pid
+    finally:
+        wrapper.close()
+        close_pools()
@@ -0,0 +1,27 @@
+import pytest
+
+from api.filters import RecipeFilter
+from recipes.cache import get_tag_ids
+from recipes.models import Recipe, Tag
+
+
+@pytest.mark.django_db
+def test_recipe_filter_accepts_plain_dict(make_recipe, author, tags):
+    recipe = make_recipe(author)
+    queryset = RecipeFilter(
+        {'tags': ['breakfast']}, queryset=Recipe.objects.all()).qs
+    assert list(queryset) == [recipe]
+
+
+@pytest.mark.django_db
+def test_tag_created_elsewhere_is_found(make_recipe, author, client, tags):
+    recipe = make_recipe(author)
+    get_tag_ids()
+    # bulk_create не отправляет сигналы, как и изменение в другом
+    # процессе с локальным кэшем: версия Tag не меняется.
+    Tag.objects.bulk_create(
+        [Tag(name='Десерт', color='#FFFFFF', slug='dessert')])
+    recipe.tags.add(Tag.objects.get(slug='dessert'))
+    response = client.get('/api/recipes/', {'tags': 'dessert'})
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json()['results']] == [recipe.id]
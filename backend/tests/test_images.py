@@ -0,0 +1,35 @@
+import base64
+import io
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.fields import HashedBase64ImageField
+
+
+@pytest.fixture
+def field(tmp_path):
+    return HashedBase64ImageField(
+        upload_to='recipes/', storage=FileSystemStorage(tmp_path))
+
+
+def encode_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, 'PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def test_line_wrapped_base64(field):
+    data = encode_image()
+    wrapped = '\r\n'.join(
+        data[start:start + 76] for start in range(0, len(data), 76))
+    name = field.to_internal_value('data:image/png;base64,' + wrapped)
+    assert name == field.to_internal_value(data)
+    assert name.endswith('.png')
+
+
+def test_invalid_base64(field):
+    with pytest.raises(ValidationError):
+        field.to_internal_value('data:image/png;base64,' + '*' * 8)
@@ -0,0 +1,55 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import Ingredient, Tag
+from recipes.search import ingredient_index
+
+
+def run_import(tmp_path, model_name, content, *args):
+    path = tmp_path / 'data.csv'
+    path.write_text(content, encoding='utf-8')
+    out = io.StringIO()
+    call_command(
+        'import', '--path', str(path), '--model_name', model_name, *args,
+        stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_reimport_ingredients(tmp_path):
+    content = 'name,measurement_unit\nсоль,г\nсахар,г\n'
+    assert 'inserted 2, updated 0, skipped 0' in run_import(
+        tmp_path, 'recipes.Ingredient', content)
+    assert 'inserted 0, updated 0, skipped 2' in run_import(
+        tmp_path, 'recipes.Ingredient', content)
+    output = run_import(
+        tmp_path, 'recipes.Ingredient',
+        'name,measurement_unit,price\nсоль,г,10\nсоль,кг,\n')
+    assert 'inserted 1, updated 1, skipped 0' in output
+    salt = Ingredient.objects.get(name='соль', measurement_unit='г')
+    assert salt.price == 10
+    assert Ingredient.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_conflicting_tag_is_skipped(tmp_path):
+    Tag.objects.create(name='Завтрак', color='#FFD700', slug='breakfast')
+    output = run_import(
+        tmp_path, 'recipes.Tag',
+        'name,color,slug\nЗавтрак,#000000,morning\nУжин,#0000FF,dinner\n',
+        '--unique_fields', 'slug')
+    assert 'inserted 1, updated 0, skipped 1' in output
+    assert set(Tag.objects.values_list('slug', flat=True)) == {
+        'breakfast', 'dinner'}
+
+
+@pytest.mark.django_db
+def test_import_invalidates_ingredient_index(tmp_path):
+    assert ingredient_index.search('соль') == []
+    run_import(
+        tmp_path, 'recipes.Ingredient', 'name,measurement_unit\nсоль,г\n')
+    assert [
+        ingredient.name for ingredient in ingredient_index.search('соль')
+    ] == ['соль']
@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture
+def recipes(make_recipe, author):
+    return [make_recipe(author, number) for number in range(3)]
+
+
+@pytest.mark.django_db
+def test_cursor_pages(client, recipes):
+    response = client.get(
+        '/api/recipes/', {'pagination': 'cursor', 'limit': 2})
+    assert response.status_code == 200
+    first = response.json()
+    response = client.get(first['next'])
+    assert response.status_code == 200
+    second = response.json()
+    assert second['next'] is None
+    assert [
+        item['id'] for item in first['results'] + second['results']
+    ] == [recipe.id for recipe in reversed(recipes)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', (
+    {'search': 'Рецепт'},
+    {'is_favorited': 1},
+    {'is_in_shopping_cart': 1},
+))
+def test_cursor_rejects_other_ordering(user_client, recipes, params):
+    response = user_client.get(
+        '/api/recipes/', {'pagination': 'cursor', **params})
+    assert response.status_code == 400
+    assert 'cursor' in response.json()
+    response = user_client.get('/api/recipes/', params)
+    assert response.status_code == 200
@@ -0,0 +1,103 @@
+import pytest
+
+from recipes.models import Favorite, Recipe
+
+# Число запросов к базе не должно зависеть от размера страницы.
+PAGE_SIZES = (1, 6)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', PAGE_SIZES)
+@pytest.mark.parametrize('authenticated, queries', ((False, 5), (True, 6)))
+def test_recipe_list(count, authenticated, queries, make_recipes, client,
+                     user, django_assert_num_queries):
+    make_recipes(count)
+    if authenticated:
+        client.force_authenticate(user)
+    with django_assert_num_queries(queries):
+        response = client.get('/api/recipes/', {'limit': 10})
+    assert response.status_code == 200
+    assert len(response.json()['results']) == count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', PAGE_SIZES)
+@pytest.mark.parametrize('authenticated, queries', ((False, 4), (True, 5)))
+def test_recipe_detail(count, authenticated, queries, make_recipe, author,
+                       client, user, django_assert_num_queries):
+    recipe = make_recipe(author, ingredients_count=count % 5)
+    if authenticated:
+        client.force_authenticate(user)
+    with django_assert_num_queries(queries):
+        response = client.get(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    assert len(response.json()['ingredients']) == count % 5
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', PAGE_SIZES)
+def test_subscriptions(count, make_user, make_recipe, user, user_client,
+                       django_assert_num_queries):
+    for number in range(count):
+        author = make_user(f'author{number}')
+        user.subscriber.create(author=author)
+        for recipe_number in range(3):
+            make_recipe(author, recipe_number)
+    with django_assert_num_queries(3):
+        response = user_client.get(
+            '/api/users/subscriptions/', {'recipes_limit': 2})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert len(results) == count
+    assert all(len(author['recipes']) == 2 for author in results)
+    assert all(author['recipes_count'] == 3 for author in results)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', PAGE_SIZES)
+@pytest.mark.parametrize('file_format', ('txt', 'csv', 'pdf'))
+def test_download_shopping_cart(count, file_format, make_recipes,
+                                user_client, django_assert_num_queries):
+    make_recipes(count * 2)
+    url = '/api/recipes/download_shopping_cart/'
+    with django_assert_num_queries(2):
+        response = user_client.get(url, {'type': file_format})
+        content = b''.join(response.streaming_content)
+    assert response.status_code == 200
+    assert content
+    # Повторно собранный список берётся из кэша.
+    with django_assert_num_queries(1):
+        repeated = user_client.get(url, {'type': file_format})
+        repeated_content = b''.join(repeated.streaming_content)
+    if file_format != 'pdf':
+        # В PDF записывается время создания.
+        assert repeated_content == content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', PAGE_SIZES)
+def test_shopping_cart_summary(count, make_recipes, user_client,
+                               django_assert_num_queries):
+    make_recipes(count * 2)
+    with django_assert_num_queries(2):
+        response = user_client.get('/api/recipes/shopping_cart_summary/')
+    assert response.status_code == 200
+    assert response.json()['ingredients']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', PAGE_SIZES)
+@pytest.mark.parametrize('method, queries', (('post', 8), ('delete', 5)))
+def test_bulk_toggles(count, method, queries, make_recipe, author,
+                      user, user_client, django_assert_num_queries):
+    recipes = [make_recipe(author, number) for number in range(count)]
+    if method == 'delete':
+        for recipe in recipes:
+            Favorite.objects.create(user=user, recipe=recipe)
+    with django_assert_num_queries(queries):
+        response = getattr(user_client, method)(
+            '/api/recipes/favorite/bulk/',
+            {'ids': [recipe.id for recipe in recipes]}, format='json')
+    assert response.status_code == 200
+    favorites = Recipe.objects.values_list('favorites_count', flat=True)
+    assert list(favorites) == [int(method == 'post')] * count
@@ -0,0 +1,64 @@
+import base64
+import io
+
+import pytest
+from django.db import connection
+from PIL import Image
+
+from recipes.models import Ingredient
+
+# Число запросов не должно зависеть от числа ингредиентов.
+INGREDIENT_COUNTS = (2, 30)
+
+# В PostgreSQL после записи рецепта пересчитывается search_vector.
+SEARCH_QUERIES = int(connection.vendor == 'postgresql')
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()).decode()
+
+
+@pytest.fixture
+def many_ingredients():
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(max(INGREDIENT_COUNTS) + 1)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', INGREDIENT_COUNTS)
+def test_recipe_create_and_update(count, tags, many_ingredients,
+                                  user_client, django_assert_num_queries):
+    ingredients = list(Ingredient.objects.order_by('id'))
+    data = {
+        'ingredients': [
+            {'id': ingredient.id, 'amount': 1}
+            for ingredient in ingredients[:count]
+        ],
+        'tags': [tag.id for tag in tags],
+        'image': make_image(),
+        'name': 'Блины',
+        'text': 'Описание',
+        'cooking_time': 30,
+    }
+    with django_assert_num_queries(14 + SEARCH_QUERIES):
+        response = user_client.post('/api/recipes/', data, format='json')
+    assert response.status_code == 201
+    # Первый ингредиент удаляется, остальные меняют количество,
+    # добавляется ещё один; один тег удаляется.
+    data['ingredients'] = [
+        {'id': ingredient.id, 'amount': 2}
+        for ingredient in ingredients[1:count + 1]
+    ]
+    data['tags'] = [tag.id for tag in tags[1:]]
+    with django_assert_num_queries(18 + SEARCH_QUERIES):
+        response = user_client.patch(
+            f"/api/recipes/{response.json()['id']}/", data, format='json')
+    assert response.status_code == 200
+    assert sorted(
+        ingredient['amount'] for ingredient in response.json()['ingredients']
+    ) == [2] * count
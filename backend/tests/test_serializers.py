@@ -0,0 +1,58 @@
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import FastRecipeReadSerializer
+from api.serializers import RecipeReadSerializer
+from recipes.models import Recipe
+
+# Быстрый сериализатор должен быть хотя бы во столько раз быстрее DRF.
+MIN_SPEEDUP = 1.5
+
+
+def render(serializer_class, recipes, user, query=None):
+    request = Request(APIRequestFactory().get('/api/recipes/', query))
+    request.user = user
+    data = serializer_class(
+        recipes, many=True, context={'request': request}).data
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', (None, {'image_size': 'small'}))
+@pytest.mark.parametrize('anonymous', (False, True))
+def test_fast_serializer_matches_drf(query, anonymous, make_recipes, user):
+    make_recipes(6)
+    Recipe.objects.filter(pk__in=Recipe.objects.values('pk')[:3]).update(
+        renditions_ready=True)
+    recipes = list(Recipe.objects.add_read_relations())
+    if anonymous:
+        user = AnonymousUser()
+    fast = render(FastRecipeReadSerializer, recipes, user, query)
+    assert fast == render(RecipeReadSerializer, recipes, user, query)
+    if not anonymous:
+        assert b'"is_favorited":true' in fast
+
+
+def best_time(serializer_class, recipes, user, repeat=5):
+    """Лучшее из repeat времён рендеринга: меньше зависит от шума."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(serializer_class, recipes, user)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.mark.django_db
+def test_fast_serializer_throughput(make_recipes, user):
+    make_recipes(100)
+    recipes = list(Recipe.objects.add_read_relations())
+    fast = best_time(FastRecipeReadSerializer, recipes, user)
+    drf = best_time(RecipeReadSerializer, recipes, user)
+    assert drf / fast >= MIN_SPEEDUP, (
+        f'{len(recipes) / fast:.0f} vs {len(recipes) / drf:.0f} recipes/s')
@@ -0,0 +1,27 @@
+import pytest
+from django.core.cache import cache
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', (URL, '/api/recipes/shopping_cart_summary/'))
+def test_etag_survives_cache_eviction(url, make_recipes, user_client):
+    make_recipes(4)
+    etag = user_client.get(url)['ETag']
+    # Версии и материализованный список вытеснены или истекли.
+    cache.clear()
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_etag_changes_with_cart(make_recipes, user_client):
+    recipe = make_recipes(4)[0]
+    etag = user_client.get(URL)['ETag']
+    user_client.patch(
+        f'/api/recipes/{recipe.id}/shopping_cart/', {'multiplier': 2},
+        format='json')
+    response = user_client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
@@ -0,0 +1,119 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection, connections
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+WORKERS = 6
+
+# SQLite выполняет записи по очереди, и гонки INSERT и DELETE на нём
+# не воспроизводятся.
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='гонки воспроизводятся только на PostgreSQL, задайте DB_HOST',
+)
+
+
+def send_parallel(user, method, url, data=None):
+    """Отправляет WORKERS одинаковых запросов одновременно."""
+    barrier = threading.Barrier(WORKERS)
+
+    def request(_):
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(user)
+        try:
+            barrier.wait()
+            return getattr(client, method)(
+                url, data, format='json').status_code
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        return Counter(executor.map(request, range(WORKERS)))
+
+
+@pytest.fixture
+def toggles(make_user):
+    """user, рецепты, авторы и имя -> (префикс url, действие, записи
+    user, сумма счётчиков). У каждого объекта уже есть запись другого
+    пользователя, чтобы лишнее уменьшение счётчика не скрывалось нулём.
+    """
+    user, fan = make_user('user'), make_user('fan')
+    authors = [make_user(f'author{number}') for number in range(2)]
+    recipes = [
+        Recipe.objects.create(
+            author=authors[0], name=f'Рецепт {number}', text='Описание',
+            image='', cooking_time=1)
+        for number in range(2)
+    ]
+    for recipe in recipes:
+        Favorite.objects.create(user=fan, recipe=recipe)
+        ShoppingCart.objects.create(user=fan, recipe=recipe)
+    for author in authors:
+        Subscription.objects.create(user=fan, author=author)
+    return user, recipes, authors, {
+        'favorite': (
+            'recipes', 'favorite',
+            Favorite.objects.filter(user=user),
+            lambda: sum(Recipe.objects.values_list(
+                'favorites_count', flat=True)),
+        ),
+        'shopping_cart': (
+            'recipes', 'shopping_cart',
+            ShoppingCart.objects.filter(user=user),
+            lambda: sum(Recipe.objects.values_list(
+                'shopping_carts_count', flat=True)),
+        ),
+        'subscribe': (
+            'users', 'subscribe',
+            Subscription.objects.filter(user=user),
+            lambda: sum(User.objects.filter(
+                subscribed_to__user=fan
+            ).values_list('subscribers_count', flat=True)),
+        ),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('toggle', ('favorite', 'shopping_cart', 'subscribe'))
+def test_parallel_toggles(toggle, toggles):
+    user, recipes, authors, toggles = toggles
+    prefix, action, rows, counter = toggles[toggle]
+    target = authors[0] if toggle == 'subscribe' else recipes[0]
+    url = f'/api/{prefix}/{target.id}/{action}/'
+    for _ in range(2):
+        statuses = send_parallel(user, 'post', url)
+        assert statuses == {201: 1, 400: WORKERS - 1}
+        assert rows.count() == 1
+        assert counter() == 3
+        statuses = send_parallel(user, 'delete', url)
+        if toggle == 'subscribe':
+            assert statuses == {204: 1, 400: WORKERS - 1}
+        else:
+            assert statuses == {204: WORKERS}
+        assert rows.count() == 0
+        assert counter() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('toggle', ('favorite', 'shopping_cart', 'subscribe'))
+def test_parallel_bulk_toggles(toggle, toggles):
+    user, recipes, authors, toggles = toggles
+    prefix, action, rows, counter = toggles[toggle]
+    targets = authors if toggle == 'subscribe' else recipes
+    data = {'ids': [target.id for target in targets]}
+    url = f'/api/{prefix}/{action}/bulk/'
+    for _ in range(2):
+        statuses = send_parallel(user, 'post', url, data)
+        assert statuses == {200: WORKERS}
+        assert rows.count() == 2
+        assert counter() == 4
+        statuses = send_parallel(user, 'delete', url, data)
+        assert statuses == {200: WORKERS}
+        assert rows.count() == 0
+        assert counter() == 2
@@ -5,6 +5,8 @@ from users.models import Subscription, User
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
+    list_display = ('username', 'email', 'recipes_count',
+                    'subscribers_count',)
     search_fields = ('username', 'email',)
 
 
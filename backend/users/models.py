@@ -11,6 +11,10 @@ class User(AbstractUser):
     email = models.EmailField(max_length=254, unique=True, blank=False)
     first_name = models.CharField(max_length=150, blank=False)
     last_name = models.CharField(max_length=150, blank=False)
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Recipes count')
+    subscribers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Subscribers count')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name',)